@@ -0,0 +1,128 @@
+"""Headless batch planning: many inventories and side lengths to CSV / JSONL files.
+
+    python batch.py sample_inventory.json more/*.json --len-pair 21 18 --len-conn 21 \\
+        --modes pair connector --format jsonl --out-dir out --workers 4
+
+Every (inventory, mode, side length) is one job; jobs run in a process pool and
+each streams its results, heaviest first, straight into
+OUT_DIR/<inventory>-<mode>-<length>cm.<csv|jsonl>. One JSON line per finished
+job is printed, with the planner's SearchStats (nodes, pruned branches, search
+and export time); the exit status is 1 when any job failed.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import List, Optional
+
+from export import EXPORT_FORMATS, export_results, fmt_num
+from planner import PlateType, SearchStats, iter_symmetric_combos
+
+MODES = ("pair", "connector", "single")
+
+@dataclass
+class Job:
+    inventory: str
+    plates: List[PlateType]
+    mode: str
+    side_len_cm: float
+    bar_weight: float
+    path: str
+    fmt: str
+    include_zero: bool = False
+    top_k: Optional[int] = None
+
+def load_inventory(path: str) -> List[PlateType]:
+    # Same JSON as the GUI's 打开/保存清单; rows without weight, thickness or count
+    # are skipped and the rest ordered heaviest first, as MainWindow.collect_plates does
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: expected a JSON list of plates")
+    plates = []
+    for item in data:
+        p = PlateType(float(item.get("weight", 0.0)), float(item.get("thickness", 0.0)),
+                      int(item.get("count", 0)), str(item.get("label", "")).strip())
+        if p.weight > 0 and p.thickness > 0 and p.count > 0:
+            plates.append(p)
+    plates.sort(key=lambda p: (-p.weight, -p.thickness))
+    return plates
+
+def run_job(job: Job) -> dict:
+    start = time.perf_counter()
+    stats = SearchStats()
+    results = iter_symmetric_combos(job.plates, job.side_len_cm, mode=job.mode,
+                                    include_zero=job.include_zero, top_k=job.top_k, stats=stats)
+    rows = export_results(job.path, job.mode, results, job.bar_weight, job.plates, job.fmt)
+    seconds = time.perf_counter() - start
+    # Whatever the search did not use went to formatting and writing rows
+    stats.add_time("export", seconds - sum(stats.timings.values()))
+    return {"inventory": job.inventory, "mode": job.mode, "side_len_cm": job.side_len_cm,
+            "rows": rows, "path": job.path, "seconds": round(seconds, 3), "stats": stats.as_dict()}
+
+def make_jobs(args, inventories) -> List[Job]:
+    jobs = []
+    for path, plates in inventories:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for mode in args.modes:
+            bar = args.bar_conn if mode == "connector" else args.bar_pair
+            for side_len in (args.len_conn if mode == "connector" else args.len_pair):
+                out = os.path.join(args.out_dir, f"{stem}-{mode}-{fmt_num(side_len)}cm.{args.format}")
+                jobs.append(Job(path, plates, mode, side_len, bar, out, args.format, args.include_zero, args.top_k))
+    return jobs
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("inventories", nargs="+", help="inventory JSON files")
+    ap.add_argument("--len-pair", type=float, nargs="+", default=[21.0], help="side lengths (cm) for pair and single")
+    ap.add_argument("--len-conn", type=float, nargs="+", default=[21.0], help="side lengths (cm) for connector")
+    ap.add_argument("--bar-pair", type=float, default=0.365, help="weight of one dumbbell bar (kg)")
+    ap.add_argument("--bar-conn", type=float, default=1.0, help="weight of the connector bar (kg)")
+    ap.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    ap.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    ap.add_argument("--out-dir", default=".")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes; 1 runs in this process")
+    ap.add_argument("--top-k", type=int, default=None, help="keep only the k heaviest combos per job")
+    ap.add_argument("--include-zero", action="store_true", help="include the empty combo")
+    args = ap.parse_args(argv)
+
+    inventories = []
+    for path in args.inventories:
+        try:
+            inventories.append((path, load_inventory(path)))
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            ap.error(f"cannot read inventory {path}: {e}")
+    jobs = make_jobs(args, inventories)
+    paths = [job.path for job in jobs]
+    if len(set(paths)) != len(paths):
+        ap.error("two inventories share a file name; their outputs would overwrite each other")
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    failed = 0
+    def report(job: Job, summary: Optional[dict], error: Optional[BaseException]):
+        nonlocal failed
+        if error is not None:
+            failed += 1
+            summary = {"inventory": job.inventory, "mode": job.mode, "side_len_cm": job.side_len_cm,
+                       "error": f"{type(error).__name__}: {error}"}
+        print(json.dumps(summary, ensure_ascii=False), flush=True)
+
+    if args.workers <= 1:
+        for job in jobs:
+            try:
+                report(job, run_job(job), None)
+            except Exception as e:
+                report(job, None, e)
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = {pool.submit(run_job, job): job for job in jobs}
+            for fut in as_completed(futures):
+                error = fut.exception()
+                report(futures[fut], None if error else fut.result(), error)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
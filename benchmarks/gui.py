@@ -0,0 +1,127 @@
+"""GUI benchmarks on an offscreen Qt platform: result table population and diagram drawing.
+
+    python benchmarks/gui.py [--family realistic --size 16] [--repeat 5] [--out gui.json]
+
+populate_result_table is timed per mode together with the event processing that
+lays out and paints the view, then sorting and filtering it; on_calc_done covers
+everything after a Calculate (and after a cache hit), and cache_write the disk
+write the result cache does on its writer thread.
+draw_layout is timed for the first draw, full redraws (side length changes) and
+blitted updates (same side length), with the canvas' own draw timings.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("XDG_CACHE_HOME", tempfile.mkdtemp())  # do not touch the user's result cache
+
+from inventories import FAMILIES, generate  # noqa: E402
+from search import meta  # noqa: E402  (also puts the repository on sys.path)
+from PySide6 import QtCore, QtWidgets  # noqa: E402
+
+import main as gui  # noqa: E402
+from planner import enumerate_all_modes  # noqa: E402
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3)}
+
+def bench_tables(app, window, shared, side_len: float, repeat: int) -> dict:
+    out = {}
+    for mode, results in (("pair", shared.pair), ("connector", shared.connector), ("single", shared.single)):
+        view = window._view(mode)
+        window.tabs.setCurrentWidget(view.parentWidget())
+
+        def populate():
+            window.populate_result_table(view, results, mode)
+            app.processEvents()
+
+        out[mode] = dict(timed(populate, repeat), rows=len(results))
+        model = window.models[mode]
+        out[mode]["sort"] = timed(lambda: (model.sort(1, QtCore.Qt.DescendingOrder),
+                                           model.sort(0, QtCore.Qt.AscendingOrder)), repeat)
+        out[mode]["filter"] = timed(lambda: (model.set_filter("kg×2"), model.set_filter("")), repeat)
+
+    def done(from_cache: bool):
+        def run():
+            window.calc_lengths = (side_len, side_len)
+            # A finished worker takes the path that stores the result; no worker means a cache hit
+            window.calc_worker = None if from_cache else gui.CalcWorker(window.cached_plates, side_len, side_len,
+                                                                       window.incremental)
+            window.on_calc_done(shared, False)
+            app.processEvents()
+        return run
+
+    cache = window.result_cache
+    out["on_calc_done"] = timed(done(False), repeat)
+    cache.flush()
+    out["on_calc_done_cached"] = timed(done(True), repeat)
+    # The disk write itself, which the window leaves to the cache's writer thread
+    out["cache_write"] = dict(timed(lambda: (cache.put(window.calc_key, shared), cache.flush()), repeat),
+                              bytes=os.path.getsize(cache._path(window.calc_key)))
+    return out
+
+def bench_diagram(app, window, shared, side_len: float, repeat: int) -> dict:
+    canvas = window.diagram_canvas()
+    app.processEvents()
+    plates = window.cached_plates
+    rows = [shared.pair[i] for i in range(0, len(shared.pair), max(1, len(shared.pair) // 20))]
+    start = time.perf_counter()
+    canvas.draw_layout(plates, rows[0].per_side_counts, side_len)
+    first = (time.perf_counter() - start) * 1000.0
+    full, blit = [], []
+    for k in range(repeat):
+        for j, row in enumerate(rows):
+            # Alternate the side length to force full redraws, then keep it for blits
+            canvas.draw_layout(plates, row.per_side_counts, side_len - 1 - (k * len(rows) + j) % 2)
+            full.append(canvas.last_draw_ms)
+        for row in rows:
+            canvas.draw_layout(plates, row.per_side_counts, side_len)
+            blit.append(canvas.last_draw_ms)
+    return {"first_ms": round(first, 3), "full_median_ms": round(statistics.median(full), 3),
+            "blit_median_ms": round(statistics.median(blit), 3), "samples": len(full) + len(blit)}
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--family", choices=sorted(FAMILIES), default="realistic")
+    ap.add_argument("--size", type=int, default=16)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--out", help="write the JSON report here (default: stdout)")
+    args = ap.parse_args(argv)
+
+    plates, side_len = generate(args.family, args.size)
+    plates.sort(key=lambda p: (-p.weight, -p.thickness))  # as MainWindow.collect_plates
+    shared = enumerate_all_modes(plates, side_len, side_len)
+
+    app = QtWidgets.QApplication([])
+    window = gui.MainWindow()
+    window.resize(1400, 900)
+    window.show()
+    app.processEvents()
+    window.cached_plates = plates
+    window.calc_key = gui.all_modes_key(plates, side_len, side_len)
+    window.input_len_pair.setValue(side_len)
+    window.input_len_conn.setValue(side_len)
+
+    report = {"meta": meta(), "case": {"family": args.family, "size": args.size, "side_len": side_len},
+              "tables": bench_tables(app, window, shared, side_len, args.repeat),
+              "diagram": bench_diagram(app, window, shared, side_len, args.repeat)}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
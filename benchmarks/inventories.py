@@ -0,0 +1,74 @@
+"""Synthetic inventories for the benchmarks.
+
+Each family maps a size (roughly: how hard the case is) and a seed to
+(plates, side length in cm), so a benchmark can sweep the size for a scaling
+curve. The same (family, size, seed) always gives the same inventory.
+"""
+import os
+import random
+import sys
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planner import PlateType  # noqa: E402
+
+Case = Tuple[List[PlateType], float]
+
+# Common home-gym plates: (weight kg, thickness cm)
+STANDARD = [(0.5, 1.5), (1.0, 2.0), (1.25, 2.5), (2.0, 3.0), (2.5, 3.0), (3.0, 4.0), (5.0, 4.5), (10.0, 5.5)]
+
+def realistic(size: int, seed: int = 0) -> Case:
+    # size plate types drawn from the standard set; brands differ a little in thickness
+    rng = random.Random(seed)
+    plates = []
+    for i in range(size):
+        w, t = STANDARD[i % len(STANDARD)]
+        t = round(t + rng.choice([0.0, 0.0, 0.25, -0.25]) * (i // len(STANDARD)), 2)
+        plates.append(PlateType(w, t, rng.choice([2, 4, 4, 6, 8, 10]), f"{w:g} kg #{i // len(STANDARD) + 1}"))
+    return plates, 21.0
+
+def many_types(size: int, seed: int = 0) -> Case:
+    # Adversarial for dedup: distinct, unrelated weights, so almost every combo has its own total
+    rng = random.Random(seed)
+    plates = [PlateType(round(rng.uniform(0.3, 6.0), 3), round(rng.uniform(1.0, 4.0), 2), rng.choice([4, 8]))
+              for _ in range(size)]
+    return plates, 21.0
+
+def high_counts(size: int, seed: int = 0) -> Case:
+    # A few types in bulk: the per-side caps, not the plate variety, set the search width
+    rng = random.Random(seed)
+    plates = [PlateType(w, t, 4 * size + rng.randint(0, 3)) for w, t in STANDARD[:4]]
+    return plates, 30.0
+
+def tiny_thickness(size: int, seed: int = 0) -> Case:
+    # Thin change plates: the side length hardly prunes anything
+    rng = random.Random(seed)
+    plates = [PlateType(w, round(rng.uniform(0.2, 0.6), 2), 8) for w in (0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5)[:size]]
+    return plates, 21.0
+
+def long_sleeve(size: int, seed: int = 0) -> Case:
+    # The standard set on an Olympic-length sleeve of 5 * size cm
+    rng = random.Random(seed)
+    plates = [PlateType(w, t, rng.choice([4, 6, 8])) for w, t in STANDARD]
+    return plates, 5.0 * size
+
+FAMILIES: Dict[str, Callable[[int, int], Case]] = {
+    "realistic": realistic,
+    "many_types": many_types,
+    "high_counts": high_counts,
+    "tiny_thickness": tiny_thickness,
+    "long_sleeve": long_sleeve,
+}
+
+# Sizes of the default scaling curve per family, smallest first
+DEFAULT_SIZES = {
+    "realistic": [4, 8, 12, 16, 20],
+    "many_types": [4, 8, 12, 14, 16],
+    "high_counts": [2, 4, 8, 16, 32],
+    "tiny_thickness": [4, 5, 6, 7, 8],
+    "long_sleeve": [4, 8, 12, 16],
+}
+
+def generate(family: str, size: int, seed: int = 0) -> Case:
+    return FAMILIES[family](size, seed)
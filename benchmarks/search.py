@@ -0,0 +1,143 @@
+"""Planner benchmarks: scaling curves of enumerate_symmetric_combos over synthetic inventories.
+
+    python benchmarks/search.py [--families realistic many_types] [--modes pair single]
+        [--engine auto] [--workers 1 4] [--repeat 3] [--max-seconds 5] [--out bench.json]
+        [--compare baseline.json --tolerance 1.3]
+
+For every family, size and mode: wall time (best of --repeat) with the planner's
+SearchStats of that run (engine, nodes, pruned branches, raw and deduplicated
+results, phase timings), and peak traced memory (one extra run under tracemalloc,
+which would distort the timings). A family's curve stops at the first size slower
+than --max-seconds. Every point runs once per --workers value; runs with more
+than one worker use the process pool and record their speedup over workers=1.
+The JSON report carries the commit, interpreter and CPU count so runs
+from different commits can be compared; with --compare the exit status is 1 when
+any point is slower than the baseline by more than --tolerance.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from inventories import DEFAULT_SIZES, FAMILIES, generate  # noqa: E402
+import planner  # noqa: E402
+
+MODES = ("pair", "connector", "single")
+
+def meta() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "numpy": planner.np.__version__ if planner.np is not None else None,
+            "date": datetime.datetime.now().isoformat(timespec="seconds")}
+
+def measure(plates, side_len: float, mode: str, engine: str, repeat: int, workers: int = 1) -> dict:
+    best = stats = None
+    for _ in range(repeat):
+        run_stats = planner.SearchStats()
+        start = time.perf_counter()
+        planner.enumerate_symmetric_combos(plates, side_len, mode=mode, engine=engine, workers=workers,
+                                           stats=run_stats)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best, stats = elapsed, run_stats
+    tracemalloc.start()
+    planner.enumerate_symmetric_combos(plates, side_len, mode=mode, engine=engine, workers=workers)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": round(best, 6), "engine_used": stats.engine, "nodes": stats.nodes, "pruned": stats.pruned,
+            "found": stats.raw, "results": stats.results, "peak_kib": round(peak / 1024, 1),
+            "phases": {k: round(v, 6) for k, v in stats.timings.items()}}
+
+def run(families, modes, engine: str, repeat: int, max_seconds: float, sizes=None, log=None,
+        workers=(1,)) -> list:
+    rows = []
+    for family in families:
+        for mode in modes:
+            for size in sizes or DEFAULT_SIZES[family]:
+                plates, side_len = generate(family, size)
+                serial = None
+                for n in workers:
+                    row = {"family": family, "size": size, "mode": mode, "engine": engine, "workers": n,
+                           "types": len(plates), "side_len": side_len}
+                    row.update(measure(plates, side_len, mode, engine, repeat, n))
+                    if n == 1:
+                        serial = row["seconds"]
+                    elif serial:
+                        row["speedup"] = round(serial / max(row["seconds"], 1e-9), 2)
+                    rows.append(row)
+                    if log:
+                        log(row)
+                if row["seconds"] > max_seconds:
+                    break
+    return rows
+
+def compare(rows: list, baseline: list, tolerance: float, min_seconds: float = 0.01) -> list:
+    # Points slower than baseline * tolerance (points under min_seconds are noise) or with other results
+    key = lambda r: (r["family"], r["size"], r["mode"], r["engine"], r.get("workers", 1))  # noqa: E731
+    base = {key(r): r for r in baseline}
+    failures = []
+    for r in rows:
+        b = base.get(key(r))
+        if b is None:
+            continue
+        point = {"family": r["family"], "size": r["size"], "mode": r["mode"], "engine": r["engine"],
+                 "workers": r.get("workers", 1)}
+        if b["results"] != r["results"]:
+            failures.append(dict(point, error=f"results {r['results']} != baseline {b['results']}"))
+        if max(r["seconds"], b["seconds"]) < min_seconds:
+            continue
+        ratio = r["seconds"] / max(b["seconds"], 1e-9)
+        if ratio > tolerance:
+            failures.append(dict(point, seconds=r["seconds"], baseline=b["seconds"], ratio=round(ratio, 2)))
+    return failures
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--families", nargs="+", choices=sorted(FAMILIES), default=list(FAMILIES))
+    ap.add_argument("--sizes", type=int, nargs="+", help="override every family's sizes")
+    ap.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    ap.add_argument("--engine", choices=planner.ENGINES, default="auto")
+    ap.add_argument("--workers", type=int, nargs="+", default=[1],
+                    help="worker counts to run every point with, e.g. 1 4 (1 is the serial baseline)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--max-seconds", type=float, default=5.0, help="stop a curve after a point this slow")
+    ap.add_argument("--out", help="write the JSON report here (default: stdout)")
+    ap.add_argument("--compare", help="baseline JSON report from an earlier run")
+    ap.add_argument("--tolerance", type=float, default=1.3, help="allowed slowdown ratio against --compare")
+    args = ap.parse_args(argv)
+
+    def log(row):
+        speedup = f" x{row['speedup']}" if "speedup" in row else ""
+        print(f"{row['family']:>14} {row['size']:>3} {row['mode']:>9} w{row['workers']:<2} {row['seconds'] * 1000:10.1f} ms "
+              f"{row['nodes']:>10} nodes {row['results']:>9} results {row['peak_kib']:>10.1f} KiB{speedup}", file=sys.stderr)
+
+    rows = run(args.families, args.modes, args.engine, args.repeat, args.max_seconds, args.sizes, log, args.workers)
+    report = {"meta": meta(), "results": rows}
+    failures = []
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            failures = compare(rows, json.load(f)["results"], args.tolerance)
+        report["regressions"] = failures
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Startup budget: import time of main.py and time until the main window is shown.
+
+    python benchmarks/startup.py [--import-budget 1.0] [--window-budget 2.0]
+
+Runs each measurement in a fresh interpreter (offscreen Qt), prints JSON and exits
+with status 1 when a budget is exceeded. matplotlib must not be imported before the
+first diagram is drawn.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WINDOW_SNIPPET = """
+import sys, time
+t0 = time.perf_counter()
+from PySide6 import QtWidgets
+import main
+app = QtWidgets.QApplication([])
+w = main.MainWindow(); w.show(); app.processEvents()
+print(time.perf_counter() - t0, "matplotlib" in sys.modules)
+"""
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+def import_time() -> dict:
+    # Cumulative `-X importtime` figures (seconds) for main and its heaviest imports
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                          cwd=ROOT, env=_env(), capture_output=True, text=True, check=True)
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line.split("|")
+        try:
+            cumulative[name.strip()] = int(cum) / 1e6
+        except ValueError:
+            continue  # header line
+    top = sorted(((n, t) for n, t in cumulative.items() if "." not in n and n != "main"), key=lambda kv: -kv[1])[:5]
+    return {"main": cumulative["main"], "top": dict(top)}
+
+def window_time() -> dict:
+    proc = subprocess.run([sys.executable, "-c", WINDOW_SNIPPET],
+                          cwd=ROOT, env=_env(), capture_output=True, text=True, check=True)
+    seconds, mpl = proc.stdout.split()[-2:]
+    return {"seconds": float(seconds), "matplotlib_loaded": mpl == "True"}
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--import-budget", type=float, default=1.0, help="seconds for `import main`")
+    ap.add_argument("--window-budget", type=float, default=2.0, help="seconds until the window is shown")
+    args = ap.parse_args(argv)
+    report = {"import": import_time(), "window": window_time(),
+              "budget": {"import": args.import_budget, "window": args.window_budget}}
+    failures = []
+    if report["import"]["main"] > args.import_budget:
+        failures.append("import")
+    if report["window"]["seconds"] > args.window_budget:
+        failures.append("window")
+    if report["window"]["matplotlib_loaded"]:
+        failures.append("matplotlib imported at startup")
+    report["failures"] = failures
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+import gzip
+import hashlib
+import json
+import os
+import sys
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple, Union
+
+from planner import (THICK_SCALE, WEIGHT_SCALE, ComboTable, ModeResults, PlateType, SearchStats, _prepare, _units,
+                     enumerate_all_modes, enumerate_symmetric_combos)
+
+# Bump whenever the planner's output or the on-disk layout changes; older files are ignored
+CACHE_FORMAT = 4
+
+Cached = Union[ComboTable, ModeResults]
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "dumbbell-planner")
+
+def inventory_key(plates: List[PlateType], **params) -> str:
+    # Canonical hash of the inventory (row order matters: results refer to row indices) and parameters.
+    # Plates are keyed in the planner's integer units, so inputs that plan the same hash the same.
+    payload = {
+        "format": CACHE_FORMAT,
+        "plates": [[_units(p.weight, WEIGHT_SCALE), _units(p.thickness, THICK_SCALE), int(p.count), p.label]
+                   for p in plates],
+        "params": params,
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+# The shared columns of a table (and of all its views), in file order
+COLUMNS = (("counts", "H"), ("weights", "q"), ("thickness", "q"), ("mode_bits", "B"))
+
+# The columns are small integers and compress well at the fastest level
+COMPRESS_LEVEL = 1
+
+def _dump(value: Cached) -> Tuple[dict, List[bytes]]:
+    # A JSON header and the raw column bytes it describes; the three views of a
+    # ModeResults share one set of columns, which is stored once. The search space
+    # is rebuilt from the plates on load.
+    if isinstance(value, ModeResults):
+        views = {"pair": value.pair, "connector": value.connector, "single": value.single}
+        head = {"kind": "modes", "searched": value.searched, "served": value.served}
+    else:
+        views = {"table": value}
+        head = {"kind": "table"}
+    base = value.pair if isinstance(value, ModeResults) else value
+    chunks = [getattr(base, name).tobytes() for name, _ in COLUMNS]
+    head.update(format=CACHE_FORMAT, byteorder=sys.byteorder, factor=base.space.factor,
+                plates=[[p.weight, p.thickness, p.count, p.label] for p in base.space.plates],
+                columns=[len(c) for c in chunks], views={})
+    for name, view in views.items():
+        rows = None
+        if view.rows is not None:
+            chunks.append(view.rows.tobytes())
+            rows = [view.rows.typecode, len(chunks[-1])]
+        head["views"][name] = {"factor": view.factor, "rows": rows}
+    return head, chunks
+
+def _read_array(f, typecode: str, size: int) -> array:
+    a = array(typecode)
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("truncated cache file")
+    a.frombytes(data)
+    return a
+
+def _load(head: dict, f) -> Cached:
+    if head.get("format") != CACHE_FORMAT:
+        raise ValueError("old cache format")
+    if head["byteorder"] != sys.byteorder:
+        raise ValueError("cache written on a machine with another byte order")
+    space = _prepare([PlateType(w, t, c, label) for w, t, c, label in head["plates"]], head["factor"])
+    base = ComboTable(space)
+    for (name, typecode), size in zip(COLUMNS, head["columns"]):
+        setattr(base, name, _read_array(f, typecode, size))
+    if len(base.counts) != len(base.weights) * base.n_cols:
+        raise ValueError("cache columns do not match the inventory")
+    views = {}
+    for name, view in head["views"].items():
+        rows = range(len(base.weights)) if view["rows"] is None else _read_array(f, *view["rows"])
+        views[name] = base.view(rows, factor=view["factor"])
+    if head["kind"] == "modes":
+        return ModeResults(views["pair"], views["connector"], views["single"],
+                           searched=head["searched"], served=head["served"])
+    return views["table"]
+
+class ResultCache:
+    # Bounded in-memory LRU of planner results, optionally backed by gzip'd files on
+    # disk (a JSON header line followed by the raw columns). With background=True the
+    # disk writes run on a writer thread; flush() waits for them.
+    def __init__(self, max_entries: int = 16, disk_dir: Optional[str] = None, max_disk_entries: int = 64,
+                 background: bool = False):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="result-cache") if background else None
+        self._pending: List[Future] = []
+        self._mem: "OrderedDict[str, Cached]" = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "entries": len(self._mem)}
+
+    def get(self, key: str) -> Optional[Cached]:
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            self.hits += 1
+            return self._mem[key]
+        value = self._read(key)
+        if value is not None:
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, value)
+            return value
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Cached):
+        self._remember(key, value)
+        if not self.disk_dir:
+            return
+        head, chunks = _dump(value)  # a snapshot: the caller may keep extending the columns
+        if self._writer is None:
+            self._write(key, head, chunks)
+        else:
+            self._pending = [f for f in self._pending if not f.done()]
+            self._pending.append(self._writer.submit(self._write, key, head, chunks))
+
+    def flush(self):
+        # Wait until the queued disk writes are done
+        pending, self._pending = self._pending, []
+        for f in pending:
+            f.result()
+
+    def get_or_compute(self, key: str, compute: Callable[[], Cached], stats: Optional[SearchStats] = None) -> Cached:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        elif stats is not None:
+            # Nothing was searched; the stats only record where the result came from
+            stats.engine = "cache"
+            stats.results = value.searched if isinstance(value, ModeResults) else len(value)
+        return value
+
+    def clear(self):
+        self._mem.clear()
+
+    def _remember(self, key: str, value: Cached):
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"v{CACHE_FORMAT}-{key}.bin.gz")
+
+    def _read(self, key: str) -> Optional[Cached]:
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rb") as f:
+                return _load(json.loads(f.readline()), f)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, KeyError, TypeError, ValueError):
+            self._discard(path)
+            return None
+
+    def _write(self, key: str, head: dict, chunks: List[bytes]):
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            path = self._path(key)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=COMPRESS_LEVEL) as f:
+                f.write(json.dumps(head, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp, path)
+            self._trim_disk()
+        except OSError:
+            pass  # the disk cache is best effort
+
+    def _trim_disk(self):
+        # Files of older formats (*.json.gz) age out with the rest
+        files = [os.path.join(self.disk_dir, n) for n in os.listdir(self.disk_dir) if n.endswith(".gz")]
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_disk_entries]:
+            self._discard(path)
+
+    @staticmethod
+    def _discard(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def cached_enumerate(cache: ResultCache, plates: List[PlateType], side_len_cm: float, mode: str = "pair", **kwargs) -> ComboTable:
+    # enumerate_symmetric_combos through the cache; progress/workers/stats do not change the result
+    params = {k: v for k, v in kwargs.items() if k not in ("progress", "workers", "stats")}
+    key = inventory_key(plates, fn="enumerate", side_len=_units(side_len_cm, THICK_SCALE), mode=mode, **params)
+    return cache.get_or_compute(key, lambda: enumerate_symmetric_combos(plates, side_len_cm, mode=mode, **kwargs),
+                                kwargs.get("stats"))
+
+def all_modes_key(plates: List[PlateType], len_pair: float, len_conn: float, include_zero: bool = False) -> str:
+    return inventory_key(plates, fn="all_modes", len_pair=_units(len_pair, THICK_SCALE),
+                         len_conn=_units(len_conn, THICK_SCALE), include_zero=include_zero)
+
+def cached_all_modes(cache: ResultCache, plates: List[PlateType], len_pair: float, len_conn: float, **kwargs) -> ModeResults:
+    key = all_modes_key(plates, len_pair, len_conn, kwargs.get("include_zero", False))
+    return cache.get_or_compute(key, lambda: enumerate_all_modes(plates, len_pair, len_conn, **kwargs), kwargs.get("stats"))
@@ -0,0 +1,160 @@
+import json
+import os
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import matplotlib
+from matplotlib import rcParams
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.collections import PatchCollection
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+from matplotlib.text import Text
+
+from cache import default_cache_dir
+from planner import PlateType
+
+# Imported on first use by main.py: matplotlib is the slowest part of startup.
+
+CJK_FONTS = [
+    "Microsoft YaHei UI", "Microsoft YaHei", "SimHei",
+    "Noto Sans CJK SC", "Source Han Sans SC", "Apple Symbols",
+    "Arial Unicode MS"
+]
+
+def _font_cache_path(cache_dir: Optional[str]) -> str:
+    return os.path.join(cache_dir or default_cache_dir(), "font.json")
+
+def resolve_chinese_font(cache_dir: Optional[str] = None) -> Optional[str]:
+    # First available CJK font. Walking fontManager.ttflist is slow on machines with
+    # many fonts, so the answer is kept in the cache dir, keyed by matplotlib version.
+    path = _font_cache_path(cache_dir)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("matplotlib") == matplotlib.__version__ and data.get("candidates") == CJK_FONTS:
+            return data.get("font")
+    except (OSError, ValueError, AttributeError):
+        pass
+    from matplotlib import font_manager
+    avail = {f.name for f in font_manager.fontManager.ttflist}
+    font = next((name for name in CJK_FONTS if name in avail), None)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"matplotlib": matplotlib.__version__, "candidates": CJK_FONTS, "font": font}, f)
+    except OSError:
+        pass  # best effort, like the result cache
+    return font
+
+def _set_chinese_font():
+    font = resolve_chinese_font()
+    if font:
+        rcParams["font.family"] = font
+    rcParams["axes.unicode_minus"] = False
+
+GAP = 0.2        # visual gap between plates (cm), display only
+PLATE_H = 0.60
+PLATE_Y = 0.25
+
+@lru_cache(maxsize=256)
+def plate_layout(stack: Tuple[Tuple[float, float, int], ...]) -> Tuple[Tuple[float, float, str], ...]:
+    # (x, width, label) of each plate on the right side, from (weight, thickness, count)
+    # in display order; the left side is the mirror image. Cached: moving through a
+    # results table revisits the same few layouts over and over.
+    out = []
+    cur = 0.0
+    for weight, thickness, count in stack:
+        shrink = min(GAP, thickness * 0.3)
+        width = max(0.01, thickness - shrink)
+        for _ in range(count):
+            out.append((cur + shrink / 2.0, width, f"{weight:g} kg"))
+            cur += thickness
+    return tuple(out)
+
+class PlateDiagramCanvas(FigureCanvas):
+    # The axes, guides, rod and titles are created once. Plates are one
+    # PatchCollection plus a pool of reused labels, both animated: a full draw
+    # caches the static background, and later updates with the same side length
+    # only restore it, redraw the plates and blit.
+    def __init__(self, parent=None):
+        _set_chinese_font()
+        self.fig = Figure(figsize=(7, 2.6), dpi=100)
+        super().__init__(self.fig)
+        self.ax = self.fig.add_subplot(111)
+        self.center = self.ax.axvline(0, linestyle="--", linewidth=1)
+        self.guide_left = self.ax.axvline(0, linestyle=":", linewidth=1)
+        self.guide_right = self.ax.axvline(0, linestyle=":", linewidth=1)
+        self.rod = Rectangle((0, 0.45), 0, 0.10, fill=True, alpha=0.15)
+        self.ax.add_patch(self.rod)
+        self.plates = PatchCollection([], facecolor="C0", alpha=0.5, linewidths=1.2, animated=True)
+        self.ax.add_collection(self.plates)
+        self.labels: List[Text] = []
+        self.ax.set_ylim(0, 1)
+        self.ax.set_yticks([])
+        self.ax.set_xlabel("从中心向左右（单位：cm）")
+        self.ax.set_title("上片图（左右对称）")
+        self.fig.tight_layout()
+        self.side_len_cm = None
+        self._background = None
+        self.last_draw_ms = 0.0   # time of the last full draw or blit
+        self.last_blit = False
+        self.mpl_connect("draw_event", self._on_draw)
+
+    def draw(self):
+        start = time.perf_counter()
+        super().draw()
+        self.last_draw_ms = (time.perf_counter() - start) * 1000.0
+        self.last_blit = False
+
+    def _on_draw(self, event):
+        # After a full draw: keep the static background, then add the animated plates
+        self._background = self.copy_from_bbox(self.fig.bbox)
+        self._draw_plates()
+
+    def _draw_plates(self):
+        self.ax.draw_artist(self.plates)
+        for t in self.labels:
+            if t.get_visible():
+                self.ax.draw_artist(t)
+
+    def draw_layout(self, plates: List[PlateType], per_side_counts: Dict[int, int], side_len_cm: float):
+        order = sorted(per_side_counts.items(), key=lambda kv: (-plates[kv[0]].weight, -plates[kv[0]].thickness))
+        layout = plate_layout(tuple((plates[i].weight, plates[i].thickness, n) for i, n in order if n > 0))
+        rects = []
+        for x, w, _ in layout:
+            rects.append(Rectangle((x, PLATE_Y), w, PLATE_H))
+            rects.append(Rectangle((-x - w, PLATE_Y), w, PLATE_H))
+        self.plates.set_paths(rects)
+        while len(self.labels) < len(rects):
+            self.labels.append(self.ax.text(0, 0, "", ha="center", va="center", fontsize=9, animated=True))
+        for t, (x, w, label) in zip(self.labels, (item for x, w, label in layout
+                                                   for item in ((x, w, label), (-x - w, w, label)))):
+            t.set_position((x + w / 2.0, PLATE_Y + PLATE_H / 2.0))
+            t.set_text(label)
+            t.set_visible(True)
+        for t in self.labels[len(rects):]:
+            t.set_visible(False)
+
+        if side_len_cm == self.side_len_cm and self._background is not None:
+            start = time.perf_counter()
+            self.restore_region(self._background)
+            self._draw_plates()
+            self.blit(self.fig.bbox)
+            self.last_draw_ms = (time.perf_counter() - start) * 1000.0
+            self.last_blit = True
+            return
+        self.side_len_cm = side_len_cm
+        self.center.set_xdata([0, 0])
+        self.guide_left.set_xdata([-side_len_cm, -side_len_cm])
+        self.guide_right.set_xdata([side_len_cm, side_len_cm])
+        self.rod.set_bounds(-side_len_cm, 0.45, 2 * side_len_cm, 0.10)
+        span = max(1.0, side_len_cm)
+        self.ax.set_xlim(-span * 1.2, span * 1.2)
+        self._background = None
+        self.draw()
+
+    def resizeEvent(self, event):
+        self._background = None  # the cached background has the old size
+        super().resizeEvent(event)
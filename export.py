@@ -0,0 +1,78 @@
+import csv
+import json
+import os
+from typing import IO, Iterable, Iterator, List, Optional
+
+from planner import ComboResult, PlateType, with_bar_weight
+
+# Streaming writers for result lists: rows are formatted one at a time, so a
+# generator (iter_symmetric_combos, a table view, the GUI's filtered rows) is
+# never materialised. Shared by the GUI export buttons and batch.py.
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+CSV_HEADERS = {
+    "pair": ["总重(每只, 不含杆, kg)", "每侧厚度(cm)", "方案（每侧）", "一对含杆总重(kg)"],
+    "connector": ["总重(整根, 不含杆, kg)", "每侧厚度(cm)", "方案（每侧）", "含杆总重(kg)"],
+    "single": ["总重(单只, 不含杆, kg)", "每侧厚度(cm)", "方案（每侧）", "含杆总重(kg)"],
+}
+
+def fmt_num(x: float) -> str:
+    s = f"{x:.3f}".rstrip("0").rstrip(".")
+    return s if s else "0"
+
+def format_for_path(path: str) -> str:
+    return "jsonl" if os.path.splitext(path)[1].lower() in (".jsonl", ".ndjson") else "csv"
+
+def write_csv(f: IO[str], mode: str, results: Iterable[ComboResult], bar_weight: float) -> int:
+    writer = csv.writer(f)
+    writer.writerow(CSV_HEADERS[mode])
+    n = 0
+    for res in results:
+        writer.writerow([fmt_num(res.total_weight), fmt_num(res.per_side_thickness), res.note,
+                         fmt_num(with_bar_weight(mode, res.total_weight, bar_weight))])
+        n += 1
+    return n
+
+def json_rows(mode: str, results: Iterable[ComboResult], bar_weight: float,
+              plates: Optional[List[PlateType]] = None) -> Iterator[dict]:
+    # per_side lists [weight, thickness, count] per plate type when the inventory is given
+    for res in results:
+        row = {"mode": mode, "total_weight": res.total_weight, "per_side_thickness": res.per_side_thickness,
+               "with_bar": with_bar_weight(mode, res.total_weight, bar_weight), "note": res.note}
+        if plates is not None:
+            row["per_side"] = [[plates[i].weight, plates[i].thickness, n]
+                               for i, n in sorted(res.per_side_counts.items()) if n > 0]
+        yield row
+
+def write_jsonl(f: IO[str], mode: str, results: Iterable[ComboResult], bar_weight: float,
+                plates: Optional[List[PlateType]] = None) -> int:
+    n = 0
+    for row in json_rows(mode, results, bar_weight, plates):
+        f.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")))
+        f.write("\n")
+        n += 1
+    return n
+
+def export_results(path: str, mode: str, results: Iterable[ComboResult], bar_weight: float,
+                   plates: Optional[List[PlateType]] = None, fmt: Optional[str] = None) -> int:
+    # Writes to a temporary file next to path and renames it, so a failed or
+    # interrupted export never leaves half a file behind. Returns the row count.
+    fmt = fmt or format_for_path(path)
+    assert fmt in EXPORT_FORMATS, f"fmt must be one of {EXPORT_FORMATS}"
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        # utf-8-sig: Excel only detects UTF-8 CSV files with a BOM
+        with open(tmp, "w", encoding="utf-8-sig" if fmt == "csv" else "utf-8", newline="") as f:
+            if fmt == "csv":
+                n = write_csv(f, mode, results, bar_weight)
+            else:
+                n = write_jsonl(f, mode, results, bar_weight, plates)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return n
@@ -1,86 +1,258 @@
 import json
-from typing import List, Dict
+import time
+from array import array
+from typing import List, Dict, Optional
 from PySide6 import QtCore, QtWidgets
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-
-from planner import PlateType, enumerate_symmetric_combos
-
-def _set_chinese_font():
-    from matplotlib import font_manager, rcParams
-    candidates = [
-        "Microsoft YaHei UI", "Microsoft YaHei", "SimHei",
-        "Noto Sans CJK SC", "Source Han Sans SC", "Apple Symbols",
-        "Arial Unicode MS"
-    ]
-    avail = {f.name for f in font_manager.fontManager.ttflist}
-    for name in candidates:
-        if name in avail:
-            rcParams["font.family"] = name
-            break
-    rcParams["axes.unicode_minus"] = False
-
-def fmt_num(x: float) -> str:
-    s = f"{x:.3f}".rstrip("0").rstrip(".")
-    return s if s else "0"
-
-class PlateDiagramCanvas(FigureCanvas):
-    def __init__(self, parent=None):
-        _set_chinese_font()
-        self.fig = Figure(figsize=(7, 2.6), dpi=100)
-        super().__init__(self.fig)
-        self.ax = self.fig.add_subplot(111)
-        self.fig.tight_layout()
-
-    def draw_layout(self, plates: List[PlateType], per_side_counts: Dict[int, int], side_len_cm: float):
-        from matplotlib.patches import Rectangle
-        self.ax.clear()
-        # Guides
-        self.ax.axvline(0, linestyle="--", linewidth=1)
-        self.ax.axvline(-side_len_cm, linestyle=":", linewidth=1)
-        self.ax.axvline(side_len_cm, linestyle=":", linewidth=1)
-        # Rod
-        rod = Rectangle((-side_len_cm, 0.45), 2*side_len_cm, 0.10, fill=True, alpha=0.15)
-        self.ax.add_patch(rod)
-
-        # Order for display
-        order = sorted(per_side_counts.items(), key=lambda kv: (-plates[kv[0]].weight, -plates[kv[0]].thickness))
-        gap = 0.2  # visual gap (cm), display only
-        plate_h = 0.60
-        y0 = 0.25
-
-        def draw_plate(x_left, width, label):
-            from matplotlib.patches import Rectangle
-            shrink = min(gap, width*0.3)
-            x0 = x_left + shrink/2.0
-            w  = max(0.01, width - shrink)
-            rect = Rectangle((x0, y0), w, plate_h, fill=True, alpha=0.5)
-            rect.set_linewidth(1.2)
-            self.ax.add_patch(rect)
-            self.ax.text(x0 + w/2.0, y0 + plate_h/2.0, label, ha="center", va="center", fontsize=9)
-
-        # Left side
-        cur = 0.0
-        for idx, cnt in order:
-            p = plates[idx]
-            for _ in range(cnt):
-                draw_plate(-cur - p.thickness, p.thickness, f"{p.weight:g} kg")
-                cur += p.thickness
-        # Right side
-        cur = 0.0
-        for idx, cnt in order:
-            p = plates[idx]
-            for _ in range(cnt):
-                draw_plate(cur, p.thickness, f"{p.weight:g} kg")
-                cur += p.thickness
-
-        span = max(1.0, side_len_cm)
-        self.ax.set_xlim(-span*1.2, span*1.2)
-        self.ax.set_ylim(0, 1)
-        self.ax.set_yticks([])
-        self.ax.set_xlabel("从中心向左右（单位：cm）")
-        self.ax.set_title("上片图（左右对称）")
-        self.draw()
+
+try:
+    import numpy as np
+except ImportError:  # optional, as in planner: row maps fall back to lists
+    np = None
+
+from cache import ResultCache, all_modes_key, default_cache_dir
+from export import export_results, fmt_num
+from planner import (AllModesStream, ComboTable, IncrementalPlanner, LengthSweep, ModeResults, PlateType, SearchCancelled, SearchStats,
+                     WeightIndex, same_weight, solve_for_target, with_bar_weight)
+
+# Planner phases (SearchStats.timings) and the window's own, in display order
+PHASE_LABELS = {"carry": "沿用旧结果", "search": "搜索", "dedup": "去重", "sort": "排序", "views": "分模式",
+                "table": "填表", "sweep": "长度索引", "render": "上片图"}
+
+RESULT_HEADERS = {
+    "pair": ["总重(每只, 不含杆, kg)", "每侧厚度(cm)", "方案（每侧）", "上片图预览", "一对含杆总重（公式）"],
+    "connector": ["总重(整根, 不含杆, kg)", "每侧厚度(cm)", "方案（每侧）", "上片图预览", "含杆总重(kg)"],
+    "single": ["总重(单只, 不含杆, kg)", "每侧厚度(cm)", "方案（每侧）", "上片图预览", "含杆总重(kg)"],
+}
+
+# Sort key of each result column; the with-bar weight orders like the plate weight
+# and the diagram column keeps the planner order
+SORT_KEYS = ("weight", "thickness", "plan", "row", "weight")
+
+# Length slider positions per cm: 0.01 cm, the precision of the side-length spin boxes
+SLIDER_SCALE = 100
+
+class ResultTableModel(QtCore.QAbstractTableModel):
+    # Read-only view over a result list; cell text is only formatted in data().
+    # Sorting and the plan filter happen here, not in a proxy: `rows` holds the
+    # source rows in display order (None: all, in planner order) and a ComboTable
+    # computes it from its integer columns in one pass (ComboTable.order).
+    def __init__(self, mode: str, parent=None):
+        super().__init__(parent)
+        self.mode = mode
+        self.results = []
+        self.bar_weight = 0.0
+        self.plates = None  # the inventory the rows' per_side_counts index into
+        self.index_with_bar = None
+        self.searchable = False
+        self.rows = None
+        self._display = None  # source row -> display row (-1: filtered out), built on demand
+        self.sort_column, self.sort_order = -1, QtCore.Qt.AscendingOrder
+        self.filter_text = ""
+
+    def set_results(self, results, bar_weight: float, plates=None):
+        self.beginResetModel()
+        self.results = results
+        self.bar_weight = bar_weight
+        self.plates = plates
+        self.index_with_bar = None
+        self.searchable = False
+        self._arrange()
+        self.endResetModel()
+
+    def build_indexes(self):
+        # Sorted with-bar weight index for search (what the tables show), built once per Calculate
+        self.index_with_bar = WeightIndex.for_results(self.results, self.mode, self.bar_weight)
+
+    def mark_searchable(self):
+        # Defer build_indexes until the first search (the length slider replaces results often)
+        self.index_with_bar = None
+        self.searchable = True
+
+    def append_results(self, results):
+        # Streamed rows go to the end, filtered but not sorted; the final results re-sort
+        if not results:
+            return
+        first = len(self.results)
+        self.results.extend(results)
+        new = range(first, len(self.results))
+        if self.rows is not None:
+            new = [first + p for p in self._streamed_table(results).order(None, text=self.filter_text, vectorised=False)]
+        if not new:
+            return
+        shown = self.rowCount()
+        self.beginInsertRows(QtCore.QModelIndex(), shown, shown + len(new) - 1)
+        if self.rows is not None:
+            self.rows = list(self.rows) + new
+        self._display = None
+        self.endInsertRows()
+
+    @staticmethod
+    def _streamed_table(rows) -> ComboTable:
+        # Streamed ComboRows as a view of the search's own table, so they sort and
+        # filter exactly like the final results (without NumPy: the search is still
+        # appending to those columns)
+        return rows[0].table.view(array("I", (r.row for r in rows)))
+
+    def _arrange(self):
+        # Recompute rows for the current sort column/order and filter text
+        self._display = None
+        by = SORT_KEYS[self.sort_column] if 0 <= self.sort_column < len(SORT_KEYS) else None
+        descending = self.sort_order == QtCore.Qt.DescendingOrder
+        if by == "row" and not descending:
+            by = None
+        if by is None and not self.filter_text:
+            self.rows = None
+        elif not len(self.results):
+            self.rows = []
+        else:
+            final = isinstance(self.results, ComboTable)
+            table = self.results if final else self._streamed_table(self.results)
+            self.rows = table.order(None if by == "row" else by, descending, self.filter_text, vectorised=final)
+            if by == "row":
+                self.rows = self.rows[::-1]
+
+    def sort(self, column: int, order=QtCore.Qt.AscendingOrder):
+        self._relayout(sort_column=column, sort_order=order)
+
+    def set_filter(self, text: str):
+        if text != self.filter_text:
+            self._relayout(filter_text=text)
+
+    def _relayout(self, **settings):
+        # Apply settings, rearrange, and move persistent indexes (selection, current row) with their rows
+        self.layoutAboutToBeChanged.emit()
+        old = self.persistentIndexList()
+        sources = [self.source_row(i.row()) for i in old]
+        for name, value in settings.items():
+            setattr(self, name, value)
+        self._arrange()
+        new = []
+        for i, src in zip(old, sources):
+            row = self.display_row(src)
+            new.append(self.index(row, i.column()) if row >= 0 else QtCore.QModelIndex())
+        self.changePersistentIndexList(old, new)
+        self.layoutChanged.emit()
+
+    def source_row(self, row: int) -> int:
+        # Position in results of a display row
+        return row if self.rows is None else int(self.rows[row])
+
+    def display_row(self, source: int) -> int:
+        # Display row of a position in results; -1 when the filter hides it
+        if self.rows is None:
+            return source if 0 <= source < len(self.results) else -1
+        if self._display is None:
+            if np is not None and not isinstance(self.rows, list):
+                self._display = np.full(len(self.results), -1, dtype=np.int64)
+                self._display[self.rows] = np.arange(len(self.rows))
+            else:
+                self._display = [-1] * len(self.results)
+                for d, s in enumerate(self.rows):
+                    self._display[s] = d
+        return int(self._display[source]) if 0 <= source < len(self._display) else -1
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.results) if self.rows is None else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else 5
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole:
+            if orientation == QtCore.Qt.Horizontal:
+                return RESULT_HEADERS[self.mode][section]
+            return str(section + 1)
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        col = index.column()
+        if role == QtCore.Qt.DisplayRole:
+            res = self.results[self.source_row(index.row())]
+            if col == 0:
+                return fmt_num(res.total_weight)
+            if col == 1:
+                return fmt_num(res.per_side_thickness)
+            if col == 2:
+                return res.note
+            if col == 3:
+                return "查看上片图"
+            with_bar = with_bar_weight(self.mode, res.total_weight, self.bar_weight)
+            if self.mode == "pair":
+                return f"{fmt_num(res.total_weight)}×2 + {fmt_num(self.bar_weight)}×2 = {fmt_num(with_bar)}"
+            return fmt_num(with_bar)
+        if role == QtCore.Qt.ToolTipRole and col == 3:
+            return "双击该行查看上片图"
+        if role == QtCore.Qt.TextAlignmentRole and col == 3:
+            return int(QtCore.Qt.AlignCenter)
+        return None
+
+class CalcWorker(QtCore.QObject):
+    # Runs the shared enumeration off the GUI thread. New results are streamed in
+    # batches; cancel() stops the search at its next progress callback. When the
+    # IncrementalPlanner can update its last result (only counts or side lengths
+    # changed), that update runs instead and the result arrives in one piece.
+    progress = QtCore.Signal(int, int)   # nodes visited, results found
+    batch = QtCore.Signal(object)        # {mode: [ComboRow, ...]} since the last batch
+    done = QtCore.Signal(object, bool)   # ModeResults (None for a cancelled update), cancelled
+    failed = QtCore.Signal(str)
+
+    BATCH_SECONDS = 0.1
+
+    def __init__(self, plates: List[PlateType], len_pair: float, len_conn: float, planner: IncrementalPlanner):
+        super().__init__()
+        self.plates, self.len_pair, self.len_conn = plates, len_pair, len_conn
+        self.planner = planner
+        self.stats = SearchStats()
+        self._cancelled = False
+        self._last_progress = 0.0
+
+    def cancel(self):
+        self._cancelled = True
+
+    def _on_progress(self, nodes: int, found: int):
+        now = time.monotonic()
+        if now - self._last_progress >= 0.05:
+            self._last_progress = now
+            self.progress.emit(nodes, found)
+        return not self._cancelled
+
+    @QtCore.Slot()
+    def run(self):
+        if self.planner.can_update(self.plates):
+            try:
+                self.done.emit(self.planner.update(self.plates, self.len_pair, self.len_conn, self._on_progress,
+                                                   stats=self.stats), False)
+            except SearchCancelled:
+                self.done.emit(None, True)  # nothing to show: the tables keep the previous result
+            except Exception as e:
+                self.failed.emit(str(e))
+            return
+        stream = AllModesStream(self.plates, self.len_pair, self.len_conn, progress=self._on_progress, stats=self.stats)
+        pending = {"pair": [], "connector": [], "single": []}
+        last_flush = time.monotonic()
+        cancelled = False
+        try:
+            for views in stream:
+                for mode, res in views.items():
+                    pending[mode].append(res)
+                if time.monotonic() - last_flush >= self.BATCH_SECONDS:
+                    self.batch.emit(pending)
+                    pending = {m: [] for m in pending}
+                    last_flush = time.monotonic()
+        except SearchCancelled:
+            cancelled = True
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        if any(pending.values()):
+            self.batch.emit(pending)
+        if not cancelled:
+            self.planner.adopt(stream)
+        self.done.emit(stream.result(), cancelled)
 
 class MainWindow(QtWidgets.QMainWindow):
     def __init__(self):
@@ -124,62 +296,78 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.btn_calc = QtWidgets.QPushButton("开始计算所有组合")
         left.addWidget(self.btn_calc)
+        calc_row = QtWidgets.QHBoxLayout()
+        self.calc_progress = QtWidgets.QProgressBar(); self.calc_progress.setRange(0, 1); self.calc_progress.setTextVisible(False)
+        self.btn_cancel = QtWidgets.QPushButton("取消计算"); self.btn_cancel.setEnabled(False)
+        calc_row.addWidget(self.calc_progress); calc_row.addWidget(self.btn_cancel)
+        left.addLayout(calc_row)
+        self.label_calc_status = QtWidgets.QLabel("")
+        left.addWidget(self.label_calc_status)
+        self.chk_auto = QtWidgets.QCheckBox("修改清单或长度后自动重新计算")
+        left.addWidget(self.chk_auto)
+        # Where the time of the last Calculate went; collapsed until checked
+        self.stats_box = QtWidgets.QGroupBox("计算统计"); self.stats_box.setCheckable(True); self.stats_box.setChecked(False)
+        self.label_stats = QtWidgets.QLabel("尚未计算"); self.label_stats.setVisible(False)
+        self.label_stats.setTextInteractionFlags(QtCore.Qt.TextSelectableByMouse)
+        QtWidgets.QVBoxLayout(self.stats_box).addWidget(self.label_stats)
+        self.stats_box.toggled.connect(self.label_stats.setVisible)
+        left.addWidget(self.stats_box)
+        self.calc_stats = None   # SearchStats of the last search; None when it came from the cache
+        self.gui_timings: Dict[str, float] = {}  # seconds of the window's own phases
+        self.calc_thread, self.calc_worker = None, None
+        self.incremental = IncrementalPlanner()
+        self.calc_auto = False
+        # Edits restart this timer, so a burst of spin box steps triggers one refresh
+        self.auto_timer = QtCore.QTimer(self); self.auto_timer.setSingleShot(True); self.auto_timer.setInterval(400)
+        self.auto_timer.timeout.connect(self.auto_refresh)
+        self.result_cache = ResultCache(disk_dir=default_cache_dir(), background=True)  # disk writes off the GUI thread
+        self.calc_key = None
 
         # Right: search + tabs + diagram
         right = QtWidgets.QVBoxLayout()
         h.addLayout(right, stretch=6)
 
         sr = QtWidgets.QHBoxLayout()
-        self.search_edit = QtWidgets.QLineEdit(); self.search_edit.setPlaceholderText("搜索当前页面的重量（kg）…")
+        self.search_edit = QtWidgets.QLineEdit(); self.search_edit.setPlaceholderText("搜索当前页面的重量（kg），或范围如 20-24…")
         self.btn_search = QtWidgets.QPushButton("搜索")
-        sr.addWidget(self.search_edit); sr.addWidget(self.btn_search)
+        self.filter_edit = QtWidgets.QLineEdit(); self.filter_edit.setPlaceholderText("筛选方案（如 2.5 kg）…")
+        sr.addWidget(self.search_edit); sr.addWidget(self.btn_search); sr.addWidget(self.filter_edit)
         right.addLayout(sr)
 
+        lr = QtWidgets.QHBoxLayout()
+        self.len_slider = QtWidgets.QSlider(QtCore.Qt.Horizontal); self.len_slider.setEnabled(False)
+        self.len_slider.setSingleStep(SLIDER_SCALE // 10); self.len_slider.setPageStep(SLIDER_SCALE)  # arrows 0.1 cm, page 1 cm
+        self.label_len_slider = QtWidgets.QLabel("每侧长度上限：—")
+        lr.addWidget(QtWidgets.QLabel("按每侧长度筛选")); lr.addWidget(self.len_slider, stretch=1); lr.addWidget(self.label_len_slider)
+        right.addLayout(lr)
+        self.sweep, self.calc_lengths = None, (0.0, 0.0)
+
         self.tabs = QtWidgets.QTabWidget()
         right.addWidget(self.tabs)
 
-        # Pair tab
-        self.tab_pair = QtWidgets.QWidget()
-        vpair = QtWidgets.QVBoxLayout(self.tab_pair)
-        self.label_pair_stats = QtWidgets.QLabel("—")
-        self.table_pair = QtWidgets.QTableWidget(0, 5)
-        self.table_pair.setHorizontalHeaderLabels(["总重(每只, 不含杆, kg)", "每侧厚度(cm)", "方案（每侧）", "上片图预览", "一对含杆总重（公式）"])
-        for i in (0,1,3,4):
-            self.table_pair.horizontalHeader().setSectionResizeMode(i, QtWidgets.QHeaderView.ResizeToContents)
-        self.table_pair.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.Stretch)
-        self.btn_export_pair = QtWidgets.QPushButton("导出结果为 CSV（哑铃一对）")
-        vpair.addWidget(self.label_pair_stats); vpair.addWidget(self.table_pair); vpair.addWidget(self.btn_export_pair)
+        # Result tabs: one model/view per mode
+        self.models = {}
+        self.tab_pair, self.table_pair, self.label_pair_stats, self.btn_export_pair = self._make_result_tab("pair", "导出结果为 CSV（哑铃一对）")
         self.tabs.addTab(self.tab_pair, "哑铃（配成一对）")
-
-        # Connector tab
-        self.tab_conn = QtWidgets.QWidget()
-        vconn = QtWidgets.QVBoxLayout(self.tab_conn)
-        self.label_conn_stats = QtWidgets.QLabel("—")
-        self.table_conn = QtWidgets.QTableWidget(0, 5)
-        self.table_conn.setHorizontalHeaderLabels(["总重(整根, 不含杆, kg)", "每侧厚度(cm)", "方案（每侧）", "上片图预览", "含杆总重(kg)"])
-        for i in (0,1,3,4):
-            self.table_conn.horizontalHeader().setSectionResizeMode(i, QtWidgets.QHeaderView.ResizeToContents)
-        self.table_conn.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.Stretch)
-        self.btn_export_conn = QtWidgets.QPushButton("导出结果为 CSV（连接杆）")
-        vconn.addWidget(self.label_conn_stats); vconn.addWidget(self.table_conn); vconn.addWidget(self.btn_export_conn)
+        self.tab_conn, self.table_conn, self.label_conn_stats, self.btn_export_conn = self._make_result_tab("connector", "导出结果为 CSV（连接杆）")
         self.tabs.addTab(self.tab_conn, "连接杆（单根）")
-
-        # Single dumbbell tab
-        self.tab_single = QtWidgets.QWidget()
-        vs = QtWidgets.QVBoxLayout(self.tab_single)
-        self.label_single_stats = QtWidgets.QLabel("—")
-        self.table_single = QtWidgets.QTableWidget(0, 5)
-        self.table_single.setHorizontalHeaderLabels(["总重(单只, 不含杆, kg)", "每侧厚度(cm)", "方案（每侧）", "上片图预览", "含杆总重(kg)"])
-        for i in (0,1,3,4):
-            self.table_single.horizontalHeader().setSectionResizeMode(i, QtWidgets.QHeaderView.ResizeToContents)
-        self.table_single.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.Stretch)
-        self.btn_export_single = QtWidgets.QPushButton("导出结果为 CSV（单只哑铃）")
-        vs.addWidget(self.label_single_stats); vs.addWidget(self.table_single); vs.addWidget(self.btn_export_single)
+        self.tab_single, self.table_single, self.label_single_stats, self.btn_export_single = self._make_result_tab("single", "导出结果为 CSV（单只哑铃）")
         self.tabs.addTab(self.tab_single, "单只哑铃")
 
-        # Diagram
-        self.canvas = PlateDiagramCanvas()
-        right.addWidget(self.canvas)
+        # Diagram: the matplotlib canvas is only created (and matplotlib imported) on first use
+        self.canvas = None
+        self.diagram_host = QtWidgets.QWidget(); self.diagram_host.setMinimumHeight(260)
+        QtWidgets.QVBoxLayout(self.diagram_host).setContentsMargins(0, 0, 0, 0)
+        self.diagram_placeholder = QtWidgets.QLabel("双击方案查看上片图"); self.diagram_placeholder.setAlignment(QtCore.Qt.AlignCenter)
+        self.diagram_host.layout().addWidget(self.diagram_placeholder)
+        right.addWidget(self.diagram_host)
+        self.label_diagram_time = QtWidgets.QLabel("")
+        right.addWidget(self.label_diagram_time)
+        # Holding an arrow key through a table moves the current row faster than a
+        # redraw; only the row the selection settles on is drawn
+        self.preview_timer = QtCore.QTimer(self); self.preview_timer.setSingleShot(True); self.preview_timer.setInterval(50)
+        self.preview_timer.timeout.connect(self.render_pending_preview)
+        self.pending_preview = None
 
         # Signals
         self.btn_add.clicked.connect(self.add_row)
@@ -188,16 +376,51 @@ class MainWindow(QtWidgets.QMainWindow):
         self.btn_load.clicked.connect(self.open_json)
         self.btn_save.clicked.connect(self.save_json)
         self.btn_calc.clicked.connect(self.calculate)
+        self.btn_cancel.clicked.connect(self.cancel_calculation)
+        self.len_slider.valueChanged.connect(self.apply_length_filter)
+        self.input_len_pair.valueChanged.connect(self.schedule_auto_refresh)
+        self.input_len_conn.valueChanged.connect(self.schedule_auto_refresh)
         self.btn_export_pair.clicked.connect(lambda: self.export_csv("pair"))
         self.btn_export_conn.clicked.connect(lambda: self.export_csv("connector"))
         self.btn_export_single.clicked.connect(lambda: self.export_csv("single"))
-        self.table_pair.itemSelectionChanged.connect(lambda: self.preview_diagram("pair"))
-        self.table_conn.itemSelectionChanged.connect(lambda: self.preview_diagram("connector"))
-        self.table_single.itemSelectionChanged.connect(lambda: self.preview_diagram("single"))
+        for mode, view in (("pair", self.table_pair), ("connector", self.table_conn), ("single", self.table_single)):
+            view.selectionModel().currentRowChanged.connect(lambda *_, m=mode: self.preview_diagram(m))
+            view.doubleClicked.connect(lambda index, m=mode: self.render_row_diagram(m, self.source_row(m, index)))
         self.btn_search.clicked.connect(self.search_weight)
+        self.filter_edit.textChanged.connect(self.filter_results)
 
         self.load_sample()
 
+    def _make_result_tab(self, mode: str, export_text: str):
+        tab = QtWidgets.QWidget()
+        v = QtWidgets.QVBoxLayout(tab)
+        stats = QtWidgets.QLabel("—")
+        model = ResultTableModel(mode, self)
+        view = QtWidgets.QTableView()
+        view.setModel(model)
+        view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        view.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        view.horizontalHeader().setSortIndicator(-1, QtCore.Qt.AscendingOrder)  # keep planner order until a header is clicked
+        view.setSortingEnabled(True)
+        view.horizontalHeader().setResizeContentsPrecision(100)  # size columns from a sample, not every row
+        for i in (0,1,3,4):
+            view.horizontalHeader().setSectionResizeMode(i, QtWidgets.QHeaderView.ResizeToContents)
+        view.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.Stretch)
+        btn = QtWidgets.QPushButton(export_text)
+        v.addWidget(stats); v.addWidget(view); v.addWidget(btn)
+        self.models[mode] = model
+        return tab, view, stats, btn
+
+    def _view(self, mode: str) -> QtWidgets.QTableView:
+        return {"pair": self.table_pair, "connector": self.table_conn, "single": self.table_single}[mode]
+
+    def source_row(self, mode: str, index) -> int:
+        return self.models[mode].source_row(index.row()) if index.isValid() else -1
+
+    def filter_results(self, text: str):
+        for model in self.models.values():
+            model.set_filter(text.strip())
+
     # --- inventory helpers ---
     def add_row(self, weight=None, thickness=None, count=None, label=None):
         r = self.table.rowCount()
@@ -207,11 +430,30 @@ class MainWindow(QtWidgets.QMainWindow):
         c = QtWidgets.QSpinBox(); c.setRange(0, 10000); c.setValue(count if count is not None else 0)
         l = QtWidgets.QLineEdit(label or "")
         self.table.setCellWidget(r, 0, w); self.table.setCellWidget(r, 1, t); self.table.setCellWidget(r, 2, c); self.table.setCellWidget(r, 3, l)
+        for spin in (w, t, c):
+            spin.valueChanged.connect(self.schedule_auto_refresh)
+        l.textChanged.connect(self.schedule_auto_refresh)
+        self.schedule_auto_refresh()
 
     def del_rows(self):
         rows = sorted({i.row() for i in self.table.selectedIndexes()}, reverse=True)
         for r in rows:
             self.table.removeRow(r)
+        self.schedule_auto_refresh()
+
+    def schedule_auto_refresh(self, *_):
+        if self.chk_auto.isChecked():
+            self.auto_timer.start()
+
+    def auto_refresh(self):
+        if not self.chk_auto.isChecked():
+            return
+        if self.calc_worker is not None:
+            self.auto_timer.start()  # try again once the running calculation is done
+            return
+        if self.collect_plates():
+            self.calc_auto = True
+            self.calculate()
 
     def load_sample(self):
         self.table.setRowCount(0)
@@ -270,22 +512,106 @@ class MainWindow(QtWidgets.QMainWindow):
 
     # --- calculate & populate ---
     def calculate(self):
+        if self.calc_worker is not None:
+            return
         plates = self.collect_plates()
         if not plates:
             QtWidgets.QMessageBox.warning(self, "提示", "请先输入有效的杠片清单。")
             return
+        # What the tables show now, restored if an incremental update is cancelled
+        self.shown = (getattr(self, "cached_plates", None), self.calc_key, self.calc_lengths, self.sweep)
         self.cached_plates = plates
         L_pair = float(self.input_len_pair.value())
         L_conn = float(self.input_len_conn.value())
-        self.pair_results = enumerate_symmetric_combos(plates, L_pair, mode="pair")
-        self.conn_results = enumerate_symmetric_combos(plates, L_conn, mode="connector")
-        self.single_results = enumerate_symmetric_combos(plates, L_pair, mode="single")
+        self.calc_key = all_modes_key(plates, L_pair, L_conn)
+        self.calc_lengths = (L_pair, L_conn)
+        self.sweep = None; self.len_slider.setEnabled(False)
+        cached = self.result_cache.get(self.calc_key)
+        if cached is not None:
+            self.on_calc_done(cached, False)
+            return
+        incremental = self.incremental.can_update(plates)
+        if not incremental:
+            # A full search streams into empty tables; an incremental update replaces them at the end
+            for mode in ("pair", "connector", "single"):
+                self.populate_result_table(self._view(mode), [], mode)
+        self.btn_calc.setEnabled(False); self.btn_cancel.setEnabled(True)
+        self.calc_progress.setRange(0, 0)  # busy: the total size of the search is unknown
+        self.label_calc_status.setText("增量更新中…" if incremental else "计算中…")
+
+        self.calc_thread = QtCore.QThread(self)
+        self.calc_worker = CalcWorker(plates, L_pair, L_conn, self.incremental)
+        self.calc_worker.moveToThread(self.calc_thread)
+        self.calc_thread.started.connect(self.calc_worker.run)
+        self.calc_worker.progress.connect(self.on_calc_progress)
+        self.calc_worker.batch.connect(self.on_calc_batch)
+        self.calc_worker.done.connect(self.on_calc_done)
+        self.calc_worker.failed.connect(self.on_calc_failed)
+        self.calc_worker.done.connect(self.calc_thread.quit)
+        self.calc_worker.failed.connect(self.calc_thread.quit)
+        self.calc_thread.finished.connect(self.calc_worker.deleteLater)
+        self.calc_thread.finished.connect(self.calc_thread.deleteLater)
+        self.calc_thread.start()
+
+    def cancel_calculation(self):
+        if self.calc_worker is not None:
+            self.calc_worker.cancel()
+            self.btn_cancel.setEnabled(False)
+            self.label_calc_status.setText("正在取消…")
+
+    def on_calc_progress(self, nodes: int, found: int):
+        self.label_calc_status.setText(f"已搜索 {nodes} 个节点，找到 {found} 个方案…")
+
+    def on_calc_batch(self, batch):
+        for mode, results in batch.items():
+            self.models[mode].append_results(results)
+
+    def on_calc_failed(self, message: str):
+        self._finish_calculation()
+        self.label_calc_status.setText("计算失败")
+        QtWidgets.QMessageBox.warning(self, "错误", f"计算失败：{message}")
+
+    def on_calc_done(self, shared: Optional[ModeResults], cancelled: bool):
+        from_cache = self.calc_worker is None
+        self._finish_calculation()
+        if shared is None:
+            self.cached_plates, self.calc_key, self.calc_lengths, self.sweep = self.shown
+            self.len_slider.setEnabled(self.sweep is not None)
+            self.calc_auto = False
+            self.label_calc_status.setText("已取消，仍显示上次结果")
+            return
+        if not cancelled and not from_cache:
+            self.result_cache.put(self.calc_key, shared)
+        self.calc_stats = None if from_cache else shared.stats
+        self.gui_timings = {}
+        self.pair_results = shared.pair
+        self.conn_results = shared.connector
+        self.single_results = shared.single
+        start = time.perf_counter()
         self.populate_result_table(self.table_pair, self.pair_results, "pair")
         self.populate_result_table(self.table_conn, self.conn_results, "connector")
         self.populate_result_table(self.table_single, self.single_results, "single")
-        self.label_pair_stats.setText(f"总方案：{len(self.pair_results)}；不同重量：{len(set(r.total_weight for r in self.pair_results))}")
-        self.label_conn_stats.setText(f"总方案：{len(self.conn_results)}；不同重量：{len(set(r.total_weight for r in self.conn_results))}")
-        self.label_single_stats.setText(f"总方案：{len(self.single_results)}；不同重量：{len(set(r.total_weight for r in self.single_results))}")
+        for model in self.models.values():
+            model.mark_searchable()
+        self.gui_timings["table"] = time.perf_counter() - start
+        start = time.perf_counter()
+        self.sweep = LengthSweep(shared)
+        self.gui_timings["sweep"] = time.perf_counter() - start
+        top = int(round(max(self.calc_lengths) * SLIDER_SCALE))
+        self.len_slider.blockSignals(True)
+        self.len_slider.setRange(0, top); self.len_slider.setValue(top); self.len_slider.setEnabled(True)
+        self.len_slider.blockSignals(False)
+        self.update_stats(max(self.calc_lengths))
+        self.show_search_stats()
+        cs = self.result_cache.stats()
+        if cancelled:
+            self.label_calc_status.setText("已取消，仅显示部分结果")
+        else:
+            how = "缓存命中" if from_cache else ("已增量更新" if self.incremental.last_update == "incremental" else "已计算")
+            self.label_calc_status.setText(f"{how}（缓存 命中 {cs['hits']} / 未命中 {cs['misses']}）")
+        auto, self.calc_auto = self.calc_auto, False
+        if auto and len(self.models[self.current_mode()].results):
+            return  # live refresh: stay on the tab being looked at
         if self.pair_results:
             self.tabs.setCurrentWidget(self.tab_pair); self.select_first_row(self.table_pair)
         elif self.conn_results:
@@ -293,53 +619,66 @@ class MainWindow(QtWidgets.QMainWindow):
         elif self.single_results:
             self.tabs.setCurrentWidget(self.tab_single); self.select_first_row(self.table_single)
 
+    def _mode_lengths(self, limit: float) -> Dict[str, float]:
+        # The slider caps each mode's own side length from the last Calculate
+        len_pair, len_conn = self.calc_lengths
+        return {"pair": min(limit, len_pair), "connector": min(limit, len_conn), "single": min(limit, len_pair)}
+
+    def update_stats(self, limit: float):
+        self.label_len_slider.setText(f"每侧长度上限：{fmt_num(limit)} cm")
+        labels = {"pair": self.label_pair_stats, "connector": self.label_conn_stats, "single": self.label_single_stats}
+        for mode, side_len in self._mode_lengths(limit).items():
+            labels[mode].setText(f"总方案：{self.sweep.count(mode, side_len)}；不同重量：{self.sweep.distinct_weights(mode, side_len)}"
+                                 f"（每侧 ≤ {fmt_num(side_len)} cm）")
+
+    def apply_length_filter(self, value: int):
+        # Slider moved: show the results for a shorter side length without recomputing
+        if self.sweep is None:
+            return
+        # The last position is exactly the calculated length
+        limit = max(self.calc_lengths) if value >= self.len_slider.maximum() else value / SLIDER_SCALE
+        start = time.perf_counter()
+        for mode, side_len in self._mode_lengths(limit).items():
+            self.populate_result_table(self._view(mode), self.sweep.table(mode, side_len), mode)
+            self.models[mode].mark_searchable()
+        self.gui_timings["table"] = time.perf_counter() - start
+        self.show_search_stats()
+        self.pair_results, self.conn_results, self.single_results = (self.models[m].results for m in ("pair", "connector", "single"))
+        self.update_stats(limit)
+
+    def show_search_stats(self):
+        st = self.calc_stats
+        if st is None:
+            lines = ["结果来自缓存，未重新搜索"]
+        else:
+            lines = [f"引擎：{st.engine or '—'}；节点：{st.nodes}；长度剪枝：{st.pruned}",
+                     f"搜索得到：{st.raw}；去重后：{st.results}" + (f"；沿用旧结果：{st.carried}" if st.carried else "")]
+        timings = dict(st.timings) if st is not None else {}
+        timings.update(self.gui_timings)
+        lines.append("；".join(f"{label} {timings[k] * 1000:.1f} ms" for k, label in PHASE_LABELS.items() if k in timings))
+        self.label_stats.setText("\n".join(lines))
+
+    def _finish_calculation(self):
+        # The thread deletes itself once its event loop has quit
+        self.calc_thread, self.calc_worker = None, None
+        self.btn_calc.setEnabled(True); self.btn_cancel.setEnabled(False)
+        self.calc_progress.setRange(0, 1)
+
+    def closeEvent(self, event):
+        if self.calc_worker is not None:
+            self.calc_worker.cancel()
+            self.calc_thread.wait()
+        self.result_cache.flush()
+        super().closeEvent(event)
+
     def select_first_row(self, table):
-        if table.rowCount()>0:
-            table.setCurrentCell(0, 0)
-
-    def _ro(self, text: str):
-        it = QtWidgets.QTableWidgetItem(text)
-        it.setFlags(it.flags() ^ QtCore.Qt.ItemIsEditable)
-        return it
-
-    def populate_result_table(self, table: QtWidgets.QTableWidget, results, mode: str):
-        table.setRowCount(0)
-        bar_pair = float(self.input_bar_pair.value())
-        bar_conn = float(self.input_bar_conn.value())
-        for r, res in enumerate(results):
-            table.insertRow(r)
-            if mode == "pair":
-                # 每只不含杆 + 公式列
-                table.setItem(r, 0, self._ro(fmt_num(res.total_weight)))
-                table.setItem(r, 1, self._ro(fmt_num(res.per_side_thickness)))
-                table.setItem(r, 2, self._ro(res.note))
-                btn = QtWidgets.QPushButton("查看上片图")
-                btn.clicked.connect(lambda _, rr=r, m=mode: self.render_row_diagram(m, rr))
-                table.setCellWidget(r, 3, btn)
-                pair_with_bars = res.total_weight*2.0 + bar_pair*2.0
-                formula = f"{fmt_num(res.total_weight)}×2 + {fmt_num(bar_pair)}×2 = {fmt_num(pair_with_bars)}"
-                table.setItem(r, 4, self._ro(formula))
-            elif mode == "connector":
-                # 不含杆 + 含杆
-                table.setItem(r, 0, self._ro(fmt_num(res.total_weight)))
-                table.setItem(r, 1, self._ro(fmt_num(res.per_side_thickness)))
-                table.setItem(r, 2, self._ro(res.note))
-                btn = QtWidgets.QPushButton("查看上片图")
-                btn.clicked.connect(lambda _, rr=r, m=mode: self.render_row_diagram(m, rr))
-                table.setCellWidget(r, 3, btn)
-                with_bar = res.total_weight + bar_conn
-                table.setItem(r, 4, self._ro(fmt_num(with_bar)))
-            else:  # single
-                # 单只：不含杆在前，含杆在最后
-                with_bar = res.total_weight + bar_pair
-                table.setItem(r, 0, self._ro(fmt_num(res.total_weight)))
-                table.setItem(r, 1, self._ro(fmt_num(res.per_side_thickness)))
-                table.setItem(r, 2, self._ro(res.note))
-                btn = QtWidgets.QPushButton("查看上片图")
-                btn.clicked.connect(lambda _, rr=r, m=mode: self.render_row_diagram(m, rr))
-                table.setCellWidget(r, 3, btn)
-                table.setItem(r, 4, self._ro(fmt_num(with_bar)))
-        table.resizeRowsToContents()
+        if table.model().rowCount()>0:
+            table.selectRow(0)
+
+    def populate_result_table(self, table: QtWidgets.QTableView, results, mode: str, plates=None):
+        # plates: the inventory the results were computed from (default: that of the last Calculate)
+        bar = float(self.input_bar_pair.value()) if mode in ("pair", "single") else float(self.input_bar_conn.value())
+        self.models[mode].set_results(results, bar, plates if plates is not None else getattr(self, "cached_plates", None))
         table.scrollToTop()
 
     # --- search ---
@@ -347,69 +686,148 @@ class MainWindow(QtWidgets.QMainWindow):
         t = self.search_edit.text().strip()
         if not t:
             return
+        mode = self.current_mode()
+        model = self.models[mode]
+        streaming = self.calc_worker is not None and not model.searchable
+        if model.searchable and model.index_with_bar is None:
+            model.build_indexes()
+        index = model.index_with_bar  # 按“含杆总重”搜索（配对为公式结果）
+        if streaming:
+            # 计算仍在进行：只搜索已得到的方案，不能用求解结果替换正在接收结果的表格
+            index = WeightIndex.for_results(model.results, mode, model.bar_weight)
+        partial = f"（计算尚未完成，仅搜索了已得到的 {len(model.results)} 个方案）" if streaming else ""
+        lo, sep, hi = t.replace("～", "~").replace("~", "-").partition("-")
         try:
-            target = float(t)
+            if sep:
+                lo, hi = float(lo), float(hi)
+            else:
+                target = float(t)
         except ValueError:
-            QtWidgets.QMessageBox.warning(self, "提示", "请输入数字（kg）。")
+            QtWidgets.QMessageBox.warning(self, "提示", "请输入数字（kg），或用“20-24”表示范围。")
             return
-        current = self.tabs.currentWidget()
-        if current == self.tab_pair:
-            table, col = self.table_pair, 4
-        elif current == self.tab_conn:
-            table, col = self.table_conn, 4
-        else:
-            table, col = self.table_single, 4  # 单只按“含杆总重”列搜索
-        exact, near = [], []
-        for r in range(table.rowCount()):
-            try:
-                w = float(table.item(r, col).text())
-            except Exception:
-                continue
-            if abs(w - target) < 1e-9:
-                exact.append(r)
-            elif abs(w - target) <= 1.0 + 1e-9:
-                near.append((abs(w - target), r))
+        if index is None:
+            if sep:
+                QtWidgets.QMessageBox.information(self, "搜索结果", "范围搜索需要先完成计算。")
+            else:
+                self.solve_target(mode, target)
+            return
+        if sep:
+            rows = index.range(min(lo, hi), max(lo, hi))
+            if rows:
+                self.select_source_row(mode, rows[0])
+                QtWidgets.QMessageBox.information(self, "搜索结果", f"{fmt_num(min(lo, hi))}–{fmt_num(max(lo, hi))} kg 内共 {len(rows)} 个方案，已定位到第一个。{partial}")
+            else:
+                QtWidgets.QMessageBox.information(self, "搜索结果", f"{fmt_num(min(lo, hi))}–{fmt_num(max(lo, hi))} kg 内没有可行方案。{partial}")
+            return
+        exact = index.exact(target)
         if exact:
-            row = exact[0]
-            table.setCurrentCell(row, col)
-            table.scrollToItem(table.item(row, col), QtWidgets.QAbstractItemView.PositionAtCenter)
+            self.select_source_row(mode, exact[0])
+            QtWidgets.QMessageBox.information(self, "搜索结果", f"找到精确匹配：{target:g} kg。{partial}")
+            return
+        cands, dist = index.nearest(target)
+        if cands and dist <= 1.0:
+            self.select_source_row(mode, cands[0])
+            weights = ", ".join([fmt_num(with_bar_weight(mode, model.results[r].total_weight, model.bar_weight)) for r in cands[:5]])
+            QtWidgets.QMessageBox.information(self, "搜索结果", f"未找到 {target:g} kg；最近的 ±1 kg：{weights}{partial}")
+            return
+        QtWidgets.QMessageBox.information(self, "搜索结果", f"未找到 {target:g} kg，且 ±1 kg 内也无可行方案。{partial}")
+
+    def solve_target(self, mode: str, target: float, k: int = 10):
+        # 尚未完整计算时，直接求解离目标最近的 k 个方案
+        plates = self.collect_plates()
+        if not plates:
+            QtWidgets.QMessageBox.warning(self, "提示", "请先输入有效的杠片清单。")
+            return
+        side_len = float(self.input_len_conn.value() if mode == "connector" else self.input_len_pair.value())
+        bar = float(self.input_bar_conn.value() if mode == "connector" else self.input_bar_pair.value())
+        results = solve_for_target(plates, side_len, mode, target, bar, k=k)
+        self.populate_result_table(self._view(mode), results, mode, plates)
+        {"pair": self.label_pair_stats, "connector": self.label_conn_stats, "single": self.label_single_stats}[mode].setText(
+            f"未完整计算：显示离 {target:g} kg 最近的 {len(results)} 个方案")
+        if not results:
+            QtWidgets.QMessageBox.information(self, "搜索结果", "没有可行方案。")
+            return
+        self.select_source_row(mode, 0)
+        best = with_bar_weight(mode, results[0].total_weight, bar)
+        if same_weight(best, target):
             QtWidgets.QMessageBox.information(self, "搜索结果", f"找到精确匹配：{target:g} kg。")
+        else:
+            QtWidgets.QMessageBox.information(self, "搜索结果", f"未找到 {target:g} kg；最接近的是 {fmt_num(best)} kg。")
+
+    def current_mode(self) -> str:
+        current = self.tabs.currentWidget()
+        if current == self.tab_pair:
+            return "pair"
+        if current == self.tab_conn:
+            return "connector"
+        return "single"
+
+    def select_source_row(self, mode: str, row: int):
+        model = self.models[mode]
+        if model.display_row(row) < 0:  # 被筛选隐藏时先清除筛选
+            self.filter_edit.clear()
+        index = model.index(model.display_row(row), 4)
+        view = self._view(mode)
+        view.setCurrentIndex(index)
+        view.scrollTo(index, QtWidgets.QAbstractItemView.PositionAtCenter)
+
+    # --- export ---
+    def export_csv(self, mode: str):
+        # Exports the rows as shown: current sort order, without rows hidden by the filter
+        model = self.models[mode]
+        if model.rowCount() == 0:
+            QtWidgets.QMessageBox.information(self, "提示", "当前没有可导出的结果，请先计算。")
+            return
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "导出结果", f"{mode}.csv", "CSV (*.csv);;JSON Lines (*.jsonl)")
+        if not path:
             return
-        if near:
-            near.sort()
-            best = near[0][0]
-            cands = [r for d, r in near if abs(d - best) < 1e-9]
-            row = cands[0]
-            table.setCurrentCell(row, col)
-            table.scrollToItem(table.item(row, col), QtWidgets.QAbstractItemView.PositionAtCenter)
-            weights = ", ".join([table.item(r, col).text() for r in cands[:5]])
-            QtWidgets.QMessageBox.information(self, "搜索结果", f"未找到 {target:g} kg；最近的 ±1 kg：{weights}")
+        rows = (model.results[model.source_row(r)] for r in range(model.rowCount()))
+        try:
+            n = export_results(path, mode, rows, model.bar_weight, model.plates)
+        except OSError as e:
+            QtWidgets.QMessageBox.warning(self, "导出失败", str(e))
             return
-        QtWidgets.QMessageBox.information(self, "搜索结果", f"未找到 {target:g} kg，且 ±1 kg 内也无可行方案。")
+        self.statusBar().showMessage(f"已导出 {n} 条方案到 {path}", 5000)
 
     # --- diagram preview & render ---
     def preview_diagram(self, mode: str):
-        table = {"pair": self.table_pair, "connector": self.table_conn, "single": self.table_single}[mode]
-        row = table.currentRow()
+        row = self.source_row(mode, self._view(mode).currentIndex())
         if row < 0:
             return
-        self.render_row_diagram(mode, row)
+        self.pending_preview = (mode, row)
+        self.preview_timer.start()
+
+    def render_pending_preview(self):
+        if self.pending_preview is not None:
+            mode, row = self.pending_preview
+            self.pending_preview = None
+            self.render_row_diagram(mode, row)
 
     def render_row_diagram(self, mode: str, row: int):
-        plates = getattr(self, "cached_plates", self.collect_plates())
-        if mode == "pair":
-            results = getattr(self, "pair_results", [])
-            side_len = float(self.input_len_pair.value())
-        elif mode == "connector":
-            results = getattr(self, "conn_results", [])
+        model = self.models[mode]
+        plates, results = model.plates or self.collect_plates(), model.results
+        if mode == "connector":
             side_len = float(self.input_len_conn.value())
         else:
-            results = getattr(self, "single_results", [])
             side_len = float(self.input_len_pair.value())
         if not results or row < 0 or row >= len(results):
             return
         res = results[row]
-        self.canvas.draw_layout(plates, res.per_side_counts, side_len)
+        self.preview_timer.stop(); self.pending_preview = None
+        canvas = self.diagram_canvas()
+        canvas.draw_layout(plates, res.per_side_counts, side_len)
+        how = "局部刷新" if canvas.last_blit else "完整绘制"
+        self.label_diagram_time.setText(f"上片图{how} {canvas.last_draw_ms:.1f} ms")
+        self.gui_timings["render"] = canvas.last_draw_ms / 1000.0
+        self.show_search_stats()
+
+    def diagram_canvas(self):
+        if self.canvas is None:
+            from diagram import PlateDiagramCanvas
+            self.canvas = PlateDiagramCanvas()
+            self.diagram_host.layout().replaceWidget(self.diagram_placeholder, self.canvas)
+            self.diagram_placeholder.deleteLater()
+        return self.canvas
 
 def main():
     app = QtWidgets.QApplication([])
@@ -1,5 +1,17 @@
-from dataclasses import dataclass
-from typing import List, Dict
+from array import array
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field, replace
+import heapq
+import time
+from math import ceil, floor, gcd
+from bisect import bisect_left, bisect_right, insort
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Dict, Tuple, Iterator, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # optional: without NumPy every search runs the DFS
+    np = None
 
 @dataclass
 class PlateType:
@@ -17,75 +29,1416 @@ class ComboResult:
     per_side_thickness: float        # cm
     per_side_counts: Dict[int, int]  # key=index in original plate list
     note: str = ""
+    modes: Tuple[str, ...] = field(default=(), compare=False)  # set by enumerate_all_modes
+
+@dataclass
+class ModeResults:
+    pair: Sequence[ComboResult]       # ComboTable views from enumerate_all_modes
+    connector: Sequence[ComboResult]
+    single: Sequence[ComboResult]
+    searched: int = 0  # combos produced by the one shared search
+    served: int = 0    # combos handed out across the three views (searched once, reused)
+    stats: Optional["SearchStats"] = field(default=None, compare=False)  # of the call that produced them
+
+# Fixed-point core: weights are integer grams and thicknesses integer hundredths
+# of a millimetre (the inputs have three decimals in kg and cm). Plates, side
+# lengths and targets are converted once at the boundary; search, dedup, sorting,
+# indexes and cache keys work on these integers, and floats (kg, cm) only appear
+# in results for display.
+WEIGHT_SCALE = 1000
+THICK_SCALE = 1000
+
+def _units(x: float, scale: int) -> int:
+    return int(round(x * scale))
+
+def same_weight(a: float, b: float) -> bool:
+    # Equal to the gram, e.g. a with-bar weight and a typed-in target
+    return _units(a, WEIGHT_SCALE) == _units(b, WEIGHT_SCALE)
+
+# progress(nodes_visited, results_found) is called every PROGRESS_EVERY search nodes
+# and once at the end; returning False cancels the search with SearchCancelled.
+ProgressCallback = Callable[[int, int], Optional[bool]]
+PROGRESS_EVERY = 4096
+
+class SearchCancelled(Exception):
+    pass
+
+class _Tracker:
+    # Node/result counters of one search, forwarded to the caller's progress callback
+    def __init__(self, callback: Optional[ProgressCallback] = None):
+        self.callback = callback
+        self.nodes = 0
+        self.found = 0
+        self.pruned = 0
+
+    def report(self):
+        if self.callback is not None and self.callback(self.nodes, self.found) is False:
+            raise SearchCancelled(f"search cancelled after {self.nodes} nodes")
+
+@dataclass
+class SearchStats:
+    # Counters and phase timings of one planner call. Pass stats=SearchStats() to
+    # a search entry point and read it afterwards; callers may add their own phases.
+    engine: str = ""     # "dfs", "numpy", "parallel", "frontier", "best_first", "incremental" or "cache" (a hit)
+    nodes: int = 0       # search nodes visited (grid points for the NumPy engine)
+    pruned: int = 0      # branches cut by the side-length check (grid points failing it)
+    raw: int = 0         # combos the search produced, before dedup
+    carried: int = 0     # incremental updates: old combos kept without searching (not in raw)
+    results: int = 0     # distinct combos returned
+    timings: Dict[str, float] = field(default_factory=dict)  # seconds per phase, in first-run order
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def _count(self, tracker: "_Tracker", results: int):
+        self.nodes, self.pruned, self.results = tracker.nodes, tracker.pruned, results
+        self.raw = tracker.found - self.carried
+
+    def as_dict(self) -> dict:
+        out = asdict(self)
+        out["timings"] = {k: round(v, 6) for k, v in self.timings.items()}
+        return out
+
+    def summary(self) -> str:
+        phases = " ".join(f"{k}={v * 1000:.1f}ms" for k, v in self.timings.items())
+        return (f"engine={self.engine} nodes={self.nodes} pruned={self.pruned} raw={self.raw} "
+                f"carried={self.carried} results={self.results} {phases}").rstrip()
+
+def _timed(items: Iterator, stats: SearchStats, name: str) -> Iterator:
+    # Re-yields items, adding only the time spent producing them (not the consumer's) to a phase
+    it = iter(items)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(it)
+        except StopIteration:
+            stats.add_time(name, time.perf_counter() - start)
+            return
+        stats.add_time(name, time.perf_counter() - start)
+        yield item
+
+EMPTY_NOTE = "（空）"
+
+@dataclass
+class _Space:
+    # Search space for one inventory factor. Plate rows with the same weight and
+    # thickness are merged into one class with a pooled count; search works on
+    # class counts and only `side_counts` maps back to the original rows.
+    plates: List[PlateType]       # original inventory
+    factor: int                   # plates per "one on each side" (4 for pair, 2 otherwise)
+    types: List[PlateType]        # one representative per class, thickness desc
+    caps: List[int]               # per-side cap of each class
+    members: List[List[int]]      # original indices of each class
+    ws: List[int]                 # weight of each class (g)
+    ts: List[int]                 # thickness of each class (THICK_SCALE units)
+
+    def side_counts(self, counts, factor: Optional[int] = None) -> Dict[int, int]:
+        out: Dict[int, int] = {}
+        for j, n in enumerate(counts):
+            if n > 0:
+                out.update(_spread(self.plates, self.members[j], n, factor or self.factor)[0])
+        return out
+
+    def note_parts(self, j: int, n: int, factor: Optional[int] = None) -> List[Tuple[PlateType, str]]:
+        # Note entries for n per-side plates of class j. A share pooled from the
+        # leftovers of several rows is listed once with all of them, e.g. "A/B×1（合并）".
+        if n <= 0:
+            return []
+        alloc, pooled = _spread(self.plates, self.members[j], n, factor or self.factor)
+        for rows in pooled:
+            alloc[rows[0]] -= 1
+        parts = [(self.plates[i], f"{self.plates[i].display()}×{k}") for i, k in alloc.items() if k > 0]
+        for rows in dict.fromkeys(pooled):
+            names = "/".join(dict.fromkeys(self.plates[i].display() for i in rows))
+            parts.append((self.plates[rows[0]], f"{names}×{pooled.count(rows)}（合并）"))
+        return parts
+
+    def note(self, counts, factor: Optional[int] = None) -> str:
+        # Plates per side by row, heaviest first
+        parts = [part for j, n in enumerate(counts) for part in self.note_parts(j, n, factor)]
+        parts.sort(key=lambda pt: (-pt[0].weight, -pt[0].thickness))
+        return " + ".join(text for _, text in parts) if parts else EMPTY_NOTE
+
+    def build(self, counts, total_weight: int, thickness: int) -> ComboResult:
+        # total_weight in grams, thickness in THICK_SCALE units
+        return ComboResult(
+            total_weight=total_weight / WEIGHT_SCALE,
+            per_side_thickness=thickness / THICK_SCALE,
+            per_side_counts=self.side_counts(counts),
+            note=self.note(counts)
+        )
+
+def _spread(plates: List[PlateType], members: List[int], n: int, factor: int
+            ) -> Tuple[Dict[int, int], List[Tuple[int, ...]]]:
+    # Hand n per-side plates of one class back to its rows: whole per-side shares
+    # first, then shares pooled from the leftover plates of several rows. A pooled
+    # share is credited to its first row in the counts (the plates are
+    # interchangeable) and also listed as the tuple of rows it takes plates from.
+    alloc = {}
+    left = n
+    for i in members:
+        k = min(left, plates[i].count // factor)
+        alloc[i] = k
+        left -= k
+    spare = {i: plates[i].count - alloc[i] * factor for i in members}
+    pooled = []
+    for _ in range(left):
+        need, rows = factor, []
+        for i in members:
+            take = min(spare[i], need)
+            if take > 0:
+                spare[i] -= take
+                need -= take
+                rows.append(i)
+            if need == 0:
+                break
+        alloc[rows[0]] += 1
+        pooled.append(tuple(rows))
+    return {i: k for i, k in alloc.items() if k > 0}, pooled
+
+def _prepare(plates: List[PlateType], factor: int) -> _Space:
+    # Equivalence classes by weight and thickness units, in first-seen order
+    classes: Dict[Tuple[int, int], List[int]] = {}
+    for i, p in enumerate(plates):
+        if p.count > 0:
+            classes.setdefault((_units(p.weight, WEIGHT_SCALE), _units(p.thickness, THICK_SCALE)), []).append(i)
+    keep = [(key, m) for key, m in classes.items() if sum(plates[i].count for i in m) // factor > 0]
+    assert all(t > 0 for (_, t), _ in keep), "plate thickness must be at least 1 / THICK_SCALE cm"
+    # order by thickness desc for pruning
+    keep.sort(key=lambda km: -km[0][1])
+    members = [m for _, m in keep]
+    types = []
+    for m in members:
+        p = plates[m[0]]
+        types.append(PlateType(p.weight, p.thickness, sum(plates[i].count for i in m), p.label))
+    caps = [p.count // factor for p in types]
+    return _Space(plates, factor, types, caps, members, [w for (w, _), _ in keep], [t for (_, t), _ in keep])
+
+# Bit per mode in ComboTable.mode_bits
+MODE_BITS = {"pair": 1, "connector": 2, "single": 4}
+
+class ComboTable:
+    # Columnar result list: class counts (row-major, n_cols per row), total weight
+    # (g), per-side thickness (THICK_SCALE units) and a modes bitmask live in flat
+    # arrays. Rows are read as ComboRow views; per_side_counts and note are only
+    # built when asked for.
+    # A view (rows is not None) shares the columns of its base table.
+    __slots__ = ("space", "factor", "n_cols", "counts", "weights", "thickness", "mode_bits", "rows")
+
+    def __init__(self, space: _Space, factor: Optional[int] = None):
+        self.space = space
+        self.factor = factor or space.factor
+        self.n_cols = len(space.types)
+        self.counts = array("H")
+        self.weights = array("q")
+        self.thickness = array("q")
+        self.mode_bits = array("B")
+        self.rows: Optional[array] = None  # base row ids of a view; None means every row in order
+
+    def append(self, counts, total_weight: int, thickness: int, bits: int = 0) -> int:
+        b = len(self.weights)
+        self.counts.extend(counts)
+        self.weights.append(total_weight)
+        self.thickness.append(thickness)
+        self.mode_bits.append(bits)
+        return b
+
+    def extend(self, counts, total_weights, thickness, bits=None):
+        # Bulk append of a NumPy block: counts is (rows, n_cols), bits an optional per-row mask
+        self.counts.frombytes(counts.astype(np.uint16).tobytes())
+        self.weights.frombytes(np.asarray(total_weights, dtype=np.int64).tobytes())
+        self.thickness.frombytes(np.asarray(thickness, dtype=np.int64).tobytes())
+        self.mode_bits.frombytes(bytes(len(counts)) if bits is None else bits.astype(np.uint8).tobytes())
+
+    def extend_columns(self, counts: array, total_weights: array, thickness: array, bits: Optional[bytes] = None):
+        # Bulk append of packed columns with this table's typecodes (see _subtree_columns)
+        self.counts.extend(counts)
+        self.weights.extend(total_weights)
+        self.thickness.extend(thickness)
+        self.mode_bits.frombytes(bytes(len(thickness)) if bits is None else bits)
+
+    def ids(self) -> Sequence[int]:
+        return self.rows if self.rows is not None else range(len(self.weights))
+
+    def _np_ids(self):
+        if self.rows is not None:
+            return np.frombuffer(self.rows, dtype=self.rows.typecode).astype(np.int64)
+        return np.arange(len(self.weights))
+
+    def _np_view(self, ids, factor: Optional[int] = None) -> "ComboTable":
+        rows = array("I")
+        rows.frombytes(ids.astype(rows.typecode).tobytes())
+        return self.view(rows, factor)
 
-def _round(x: float, nd=3) -> float:
-    return round(x + 1e-12, nd)
+    def view(self, ids: Sequence[int], factor: Optional[int] = None) -> "ComboTable":
+        out = ComboTable.__new__(ComboTable)
+        out.space, out.n_cols = self.space, self.n_cols
+        out.factor = factor or self.factor
+        out.counts, out.weights, out.thickness, out.mode_bits = self.counts, self.weights, self.thickness, self.mode_bits
+        out.rows = ids if isinstance(ids, array) else array("I", ids)
+        return out
 
-def _make_note(plates: List[PlateType], counts: Dict[int, int]) -> str:
-    parts = []
-    order = sorted(counts.items(), key=lambda kv: (-plates[kv[0]].weight, -plates[kv[0]].thickness))
-    for idx, n in order:
-        if n > 0:
-            parts.append(f"{plates[idx].display()}×{n}")
-    return " + ".join(parts) if parts else "（空）"
+    def class_counts(self, b: int) -> Tuple[int, ...]:
+        n = self.n_cols
+        return tuple(self.counts[b * n:(b + 1) * n])
+
+    def total_weights(self) -> List[float]:
+        w = self.weights
+        return [w[b] / WEIGHT_SCALE for b in self.ids()]
+
+    def weight_units(self) -> List[int]:
+        # total_weights in grams
+        w = self.weights
+        return [w[b] for b in self.ids()]
+
+    def sorted(self, by_counts: bool = False) -> "ComboTable":
+        # Stable argsort by (-total_weight, per_side_thickness). Rows appended in
+        # search order need nothing more; otherwise by_counts breaks ties by
+        # descending counts, which is the search order.
+        n = self.n_cols
+        if np is not None:
+            ids = self._np_ids()
+            w = np.frombuffer(self.weights, dtype=np.int64)[ids]
+            t = np.frombuffer(self.thickness, dtype=np.int64)[ids]
+            keys = [t, -w]
+            if by_counts and n:
+                counts = np.frombuffer(self.counts, dtype=self.counts.typecode).reshape(-1, n)[ids].astype(np.int64)
+                radices = [cap + 1 for cap in self.space.caps]
+                size = 1
+                for r in radices:
+                    size *= r
+                if size < 1 << 62:
+                    # Descending counts as one mixed-radix number
+                    code = np.zeros(len(ids), dtype=np.int64)
+                    for c, r in zip(counts.T, radices):
+                        code = code * r + c
+                    keys = [-code] + keys
+                else:
+                    keys = [-c for c in counts.T[::-1]] + keys
+            return self._np_view(ids[np.lexsort(keys)])
+        w, t = self.weights, self.thickness
+        if by_counts:
+            return self.view(sorted(self.ids(), key=lambda b: (-w[b], t[b], [-c for c in self.class_counts(b)])))
+        return self.view(sorted(self.ids(), key=lambda b: (-w[b], t[b])))
+
+    def order(self, by: Optional[str] = None, descending: bool = False, text: str = "",
+              vectorised: bool = True) -> Sequence[int]:
+        # Positions (0..len-1) of the rows in display order for a result table:
+        # stable by "weight", "thickness", "plan" (counts of the heaviest plate type
+        # first) or None (as stored), ties keeping the stored order either way; with
+        # text, only rows whose note has an entry containing it (case-insensitive,
+        # e.g. "2.5 kg" or "A×2"). Works on the integer columns in one pass.
+        # vectorised=False stays off NumPy, whose buffer views would stop another
+        # thread (a running search) from appending to the columns.
+        n_rows, n = len(self), self.n_cols
+        # Plate classes heaviest first, as the note lists them
+        plan_cols = sorted(range(n), key=lambda j: (-self.space.ws[j], -self.space.ts[j]))
+        hits = self._note_hits(text) if text else None
+        if np is not None and vectorised:
+            ids = self._np_ids()
+            if by == "weight" or by == "thickness":
+                key = np.frombuffer(self.weights if by == "weight" else self.thickness, dtype=np.int64)[ids]
+                pos = np.argsort(-key if descending else key, kind="stable")
+            elif by == "plan" and n:
+                counts = np.frombuffer(self.counts, dtype=self.counts.typecode).reshape(-1, n)[ids].astype(np.int64)
+                radices = [int(counts[:, j].max(initial=0)) + 1 for j in plan_cols]
+                size = 1
+                for r in radices:
+                    size *= r
+                if size < 1 << 62:
+                    # The counts as one mixed-radix number, as in sorted()
+                    code = np.zeros(n_rows, dtype=np.int64)
+                    for j, r in zip(plan_cols, radices):
+                        code = code * r + counts[:, j]
+                    pos = np.argsort(-code if descending else code, kind="stable")
+                else:
+                    pos = np.lexsort([-counts[:, j] if descending else counts[:, j] for j in reversed(plan_cols)])
+            else:
+                pos = np.arange(n_rows)[::-1] if descending and by is not None else np.arange(n_rows)
+            if hits is not None:
+                mask = np.zeros(n_rows, dtype=bool)
+                if n:
+                    counts = np.frombuffer(self.counts, dtype=self.counts.typecode).reshape(-1, n)[ids]
+                    for j, hit in enumerate(hits[0]):
+                        mask |= np.array(hit, dtype=bool)[counts[:, j]]
+                    if hits[1]:
+                        mask |= ~counts.any(axis=1)
+                else:
+                    mask[:] = hits[1]
+                pos = pos[mask[pos]]
+            return pos
+        ids = self.ids()
+        if by == "weight" or by == "thickness":
+            col = self.weights if by == "weight" else self.thickness
+            pos = sorted(range(n_rows), key=lambda p: col[ids[p]], reverse=descending)
+        elif by == "plan":
+            pos = sorted(range(n_rows), key=lambda p: [self.counts[ids[p] * n + j] for j in plan_cols], reverse=descending)
+        else:
+            pos = list(range(n_rows))[::-1] if descending and by is not None else list(range(n_rows))
+        if hits is not None:
+            def keep(b):
+                c = self.class_counts(b)
+                return any(hits[0][j][k] for j, k in enumerate(c)) or hits[1] and not any(c)
+            pos = [p for p in pos if keep(ids[p])]
+        return pos
+
+    def _note_hits(self, text: str):
+        # Whether text occurs in a note entry, per (class, per-side count), and in the empty note
+        needle = text.lower()
+        hits = []
+        for j, m in enumerate(self.space.members):
+            top = sum(self.space.plates[i].count for i in m) // self.factor
+            hits.append([any(needle in t.lower() for _, t in self.space.note_parts(j, k, self.factor))
+                         for k in range(top + 1)])
+        return hits, needle in EMPTY_NOTE
+
+    def unique(self) -> "ComboTable":
+        # First row of each distinct count vector, on the raw count bytes
+        n = self.n_cols
+        if np is not None and n > 0:
+            ids = self._np_ids()
+            rows = np.frombuffer(self.counts, dtype=self.counts.typecode).reshape(-1, n)[ids]
+            _, first = np.unique(rows, axis=0, return_index=True)
+            return self._np_view(ids[np.sort(first)])
+        raw = memoryview(self.counts.tobytes())
+        size = n * self.counts.itemsize
+        seen = set()
+        keep = array("I")
+        for b in self.ids():
+            key = raw[b * size:(b + 1) * size].tobytes()
+            if key not in seen:
+                seen.add(key)
+                keep.append(b)
+        return self.view(keep)
+
+    def to_results(self) -> List[ComboResult]:
+        return [r.to_result() for r in self]
+
+    def __len__(self) -> int:
+        return len(self.rows) if self.rows is not None else len(self.weights)
+
+    def __getitem__(self, i):
+        ids = self.ids()
+        if isinstance(i, slice):
+            return self.view(ids[i])
+        return ComboRow(self, ids[i])
+
+    def __iter__(self) -> Iterator["ComboRow"]:
+        for b in self.ids():
+            yield ComboRow(self, b)
+
+    def __eq__(self, other) -> bool:
+        try:
+            if len(other) != len(self):
+                return False
+        except TypeError:
+            return NotImplemented
+        return all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"<ComboTable rows={len(self)} factor={self.factor}>"
+
+class ComboRow:
+    # One row of a ComboTable with the ComboResult attributes
+    __slots__ = ("table", "row")
+
+    def __init__(self, table: ComboTable, row: int):
+        self.table = table
+        self.row = row
+
+    @property
+    def total_weight(self) -> float:
+        return self.table.weights[self.row] / WEIGHT_SCALE
+
+    @property
+    def per_side_thickness(self) -> float:
+        return self.table.thickness[self.row] / THICK_SCALE
+
+    @property
+    def per_side_counts(self) -> Dict[int, int]:
+        t = self.table
+        return t.space.side_counts(t.class_counts(self.row), t.factor)
+
+    @property
+    def note(self) -> str:
+        t = self.table
+        return t.space.note(t.class_counts(self.row), t.factor)
+
+    @property
+    def modes(self) -> Tuple[str, ...]:
+        bits = self.table.mode_bits[self.row]
+        return tuple(m for m, bit in MODE_BITS.items() if bits & bit)
+
+    def to_result(self) -> ComboResult:
+        return ComboResult(self.total_weight, self.per_side_thickness, self.per_side_counts, self.note, self.modes)
+
+    def __eq__(self, other) -> bool:
+        try:
+            return (self.total_weight == other.total_weight and self.per_side_thickness == other.per_side_thickness
+                    and self.per_side_counts == other.per_side_counts and self.note == other.note)
+        except AttributeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ComboRow(total_weight={self.total_weight!r}, per_side_thickness={self.per_side_thickness!r}, note={self.note!r})"
 
 def enumerate_symmetric_combos(
     plates: List[PlateType],
     side_len_cm: float,
     mode: str = "pair",   # "pair" (×4 inventory), "connector" (×2), "single" (×2)
     include_zero: bool = False,
-) -> List[ComboResult]:
+    engine: str = "auto", # "auto", "dfs" or "numpy" (every combo), "frontier" (best per distinct weight)
+    per_weight: int = 1,  # frontier only: how many combos to keep per distinct weight
+    workers: Optional[int] = None,  # dfs only: split the search over this many processes
+    progress: Optional[ProgressCallback] = None,
+    stats: Optional[SearchStats] = None,
+) -> ComboTable:
+    # "auto" picks the NumPy grid for small count grids and the DFS otherwise; both
+    # produce identical results.
     assert mode in ("pair", "connector", "single"), "mode must be 'pair', 'connector', or 'single'"
+    assert engine in ENGINES, f"engine must be one of {ENGINES}"
     factor = 4 if mode == "pair" else 2  # 'connector' and 'single' both use factor 2
+    stats = stats if stats is not None else SearchStats()
 
-    # Per-side caps under inventory
-    per_side_caps = [p.count // factor for p in plates]
-    usable_idx = [i for i, cap in enumerate(per_side_caps) if cap > 0]
-    if not usable_idx and not include_zero:
-        return []
+    space = _prepare(plates, factor)
+    table = ComboTable(space)
+    if not space.types and not include_zero:
+        return table
+    tracker = _Tracker(progress)
+    if engine == "frontier":
+        stats.engine = "frontier"
+        with stats.phase("search"):
+            table = _frontier_combos(space, side_len_cm, include_zero, per_weight, tracker)
+        stats._count(tracker, len(table))
+        return table
 
-    f_plates = [plates[i] for i in usable_idx]
-    f_caps   = [per_side_caps[i] for i in usable_idx]
+    limit = _units(side_len_cm, THICK_SCALE)
+    stats.engine = _leaf_engine(space, limit, workers, engine)
+    with stats.phase("search"):
+        if stats.engine == "numpy":
+            for counts, used, side in _grid_blocks(space, limit, include_zero, tracker):
+                table.extend(counts, side * 2, used)
+            tracker.report()
+        elif stats.engine == "parallel":
+            for counts, thick, weights in _parallel_columns(space, limit, include_zero, workers, tracker, engine):
+                table.extend_columns(counts, weights, thick)
+        else:
+            for counts, used_thick, side_weight in _search_leaves(space, limit, include_zero, workers, tracker, engine):
+                table.append(counts, side_weight * 2, used_thick)
+    with stats.phase("dedup"):
+        table = table.unique()
+    with stats.phase("sort"):
+        table = table.sorted()
+    stats._count(tracker, len(table))
+    return table
 
-    # order by thickness desc for pruning
-    order = sorted(range(len(f_plates)), key=lambda i: -f_plates[i].thickness)
-    f_plates = [f_plates[i] for i in order]
-    f_caps   = [f_caps[i] for i in order]
-    idx_map  = {i: usable_idx[order[i]] for i in range(len(order))}
+class AllModesStream:
+    # One shared search for all three modes. "single"/"connector" caps (count // 2)
+    # contain the "pair" caps (count // 4), so a search with the loose caps and the
+    # longer side length covers everything; each combo is stored once and tagged
+    # with the modes it serves. Iterating yields {mode: row} in search order;
+    # result() gives the sorted per-mode views of whatever has been found so far.
+    def __init__(
+        self,
+        plates: List[PlateType],
+        len_pair: float,   # side length for "pair" and "single"
+        len_conn: float,   # side length for "connector"
+        include_zero: bool = False,
+        workers: Optional[int] = None,
+        progress: Optional[ProgressCallback] = None,
+        engine: str = "auto",  # "auto", "dfs" or "numpy"
+        stats: Optional[SearchStats] = None,
+    ):
+        assert engine in ("auto", "dfs", "numpy"), "engine must be 'auto', 'dfs' or 'numpy'"
+        self.space = _prepare(plates, 2)
+        self.stats = stats if stats is not None else SearchStats()
+        self.engine = engine
+        self.len_pair = len_pair
+        self.len_conn = len_conn
+        self.lim_pair = _units(len_pair, THICK_SCALE)
+        self.lim_conn = _units(len_conn, THICK_SCALE)
+        self.limit = max(self.lim_pair, self.lim_conn)
+        self.include_zero = include_zero
+        self.workers = workers
+        self.tracker = _Tracker(progress)
+        self.table = ComboTable(self.space)
+        # Pair shares come from count // 4, which may split merged rows differently
+        self.pair_table = self.table.view((), factor=4)
+        self._pair_caps = [p.count // 4 for p in self.space.types]
 
-    results: List[ComboResult] = []
+    def _leaves(self):
+        if not self.space.types and not self.include_zero:
+            return ()
+        return _search_leaves(self.space, self.limit, self.include_zero, self.workers, self.tracker, self.engine)
 
-    def dfs(i: int, used_thick: float, side_weight: float, counts: List[int]):
-        if used_thick - 1e-9 > side_len_cm:
-            return
-        if i == len(f_plates):
+    def _bits(self, counts, thick: int) -> int:
+        fits_pair_len = thick <= self.lim_pair
+        bits = 0
+        if fits_pair_len and all(n <= cap for n, cap in zip(counts, self._pair_caps)):
+            bits |= MODE_BITS["pair"]
+        if thick <= self.lim_conn:
+            bits |= MODE_BITS["connector"]
+        if fits_pair_len:
+            bits |= MODE_BITS["single"]
+        return bits
+
+    def _block_bits(self, counts, thick):
+        # _bits over a NumPy block of rows
+        fits_pair_len = thick <= self.lim_pair
+        pair_caps = np.array(self._pair_caps, dtype=np.int64)
+        bits = np.where(fits_pair_len & (counts <= pair_caps).all(axis=1), MODE_BITS["pair"], 0)
+        bits |= np.where(thick <= self.lim_conn, MODE_BITS["connector"], 0)
+        bits |= np.where(fits_pair_len, MODE_BITS["single"], 0)
+        return bits
+
+    def _packed_bits(self, counts: array, thick: array) -> bytes:
+        # _bits over packed columns (see _subtree_columns)
+        n = len(self.space.types)
+        if np is not None:
+            rows = np.frombuffer(counts, dtype=np.uint16).reshape(-1, n).astype(np.int64)
+            return self._block_bits(rows, np.frombuffer(thick, dtype=np.int64)).astype(np.uint8).tobytes()
+        return bytes(self._bits(counts[r * n:(r + 1) * n], thick[r]) for r in range(len(thick)))
+
+    def _add(self, leaf) -> Tuple[int, int]:
+        counts, used_thick, side_weight = leaf
+        bits = self._bits(counts, used_thick)
+        return self.table.append(counts, side_weight * 2, used_thick, bits), bits
+
+    def run(self) -> ModeResults:
+        self.stats.engine = _leaf_engine(self.space, self.limit, self.workers, self.engine)
+        with self.stats.phase("search"):
+            if (self.space.types or self.include_zero) and self.stats.engine == "numpy":
+                for counts, used, side in _grid_blocks(self.space, self.limit, self.include_zero, self.tracker):
+                    self.table.extend(counts, side * 2, used, self._block_bits(counts, used))
+                self.tracker.report()
+            elif self.space.types and self.stats.engine == "parallel":
+                for counts, thick, weights in _parallel_columns(self.space, self.limit, self.include_zero,
+                                                                self.workers, self.tracker, self.engine):
+                    self.table.extend_columns(counts, weights, thick, self._packed_bits(counts, thick))
+            else:
+                for leaf in self._leaves():
+                    self._add(leaf)
+        return self.result()
+
+    def __iter__(self) -> Iterator[Dict[str, "ComboRow"]]:
+        self.stats.engine = _leaf_engine(self.space, self.limit, self.workers, self.engine)
+        for leaf in _timed(self._leaves(), self.stats, "search"):
+            b, bits = self._add(leaf)
+            yield {mode: ComboRow(self.pair_table if mode == "pair" else self.table, b)
+                   for mode, bit in MODE_BITS.items() if bits & bit}
+
+    def result(self, by_counts: bool = False) -> ModeResults:
+        # by_counts: rows were not added in search order (see IncrementalPlanner)
+        with self.stats.phase("sort"):
+            ordered = self.table.sorted(by_counts).rows
+        bits = self.table.mode_bits
+        views = {}
+        with self.stats.phase("views"):
+            for mode, bit in MODE_BITS.items():
+                source = self.pair_table if mode == "pair" else self.table
+                if np is not None:
+                    ids = np.frombuffer(ordered, dtype=ordered.typecode)
+                    views[mode] = source._np_view(ids[(np.frombuffer(bits, dtype=np.uint8)[ids] & bit) != 0])
+                else:
+                    views[mode] = source.view(array("I", (b for b in ordered if bits[b] & bit)))
+        served = sum(len(v) for v in views.values())
+        self.stats._count(self.tracker, len(ordered))
+        return ModeResults(views["pair"], views["connector"], views["single"], searched=len(ordered), served=served,
+                           stats=self.stats)
+
+def enumerate_all_modes(
+    plates: List[PlateType],
+    len_pair: float,   # side length for "pair" and "single"
+    len_conn: float,   # side length for "connector"
+    include_zero: bool = False,
+    workers: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    stats: Optional[SearchStats] = None,
+) -> ModeResults:
+    return AllModesStream(plates, len_pair, len_conn, include_zero, workers, progress, stats=stats).run()
+
+def iter_all_modes(
+    plates: List[PlateType],
+    len_pair: float,
+    len_conn: float,
+    include_zero: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    stats: Optional[SearchStats] = None,
+) -> Iterator[Dict[str, "ComboRow"]]:
+    # Streaming form of enumerate_all_modes: yields {mode: combo} in search order.
+    # A stable sort of each mode's stream by (-total_weight, per_side_thickness)
+    # gives exactly the enumerate_all_modes lists.
+    return iter(AllModesStream(plates, len_pair, len_conn, include_zero, progress=progress, stats=stats))
+
+class LengthSweep:
+    # Per-mode thickness indexes over one ModeResults: the results for any side
+    # length up to the one searched are a prefix query, with no new search.
+    # Thickness is indexed in THICK_SCALE units, like the search compares it.
+    def __init__(self, results: ModeResults):
+        self.results = results
+        self._thick: Dict[str, Sequence[int]] = {}    # per mode, ascending
+        self._firsts: Dict[str, Sequence[int]] = {}   # per mode: thinnest combo of each distinct weight, ascending
+        for mode in MODE_BITS:
+            table = getattr(results, mode)
+            if np is not None:
+                ids = table._np_ids()
+                w = np.frombuffer(table.weights, dtype=np.int64)[ids]
+                t = np.frombuffer(table.thickness, dtype=np.int64)[ids]
+                by_weight = np.lexsort((t, w))
+                first = np.ones(len(ids), dtype=bool)
+                first[1:] = w[by_weight][1:] != w[by_weight][:-1]
+                self._thick[mode] = np.sort(t)
+                self._firsts[mode] = np.sort(t[by_weight][first])
+                continue
+            thick = [table.thickness[b] for b in table.ids()]
+            first: Dict[int, int] = {}
+            for w, t in zip(table.weight_units(), thick):
+                if w not in first or t < first[w]:
+                    first[w] = t
+            self._thick[mode] = sorted(thick)
+            self._firsts[mode] = sorted(first.values())
+
+    @classmethod
+    def search(
+        cls,
+        plates: List[PlateType],
+        max_len: float,
+        include_zero: bool = False,
+        workers: Optional[int] = None,
+        progress: Optional[ProgressCallback] = None,
+    ) -> "LengthSweep":
+        # One shared search at the longest side length of interest
+        return cls(enumerate_all_modes(plates, max_len, max_len, include_zero, workers, progress))
+
+    def count(self, mode: str, side_len_cm: float) -> int:
+        return bisect_right(self._thick[mode], _units(side_len_cm, THICK_SCALE))
+
+    def distinct_weights(self, mode: str, side_len_cm: float) -> int:
+        return bisect_right(self._firsts[mode], _units(side_len_cm, THICK_SCALE))
+
+    def table(self, mode: str, side_len_cm: float) -> ComboTable:
+        # The mode's results that fit side_len_cm, still in result order
+        table = getattr(self.results, mode)
+        if self.count(mode, side_len_cm) == len(table):
+            return table
+        limit = _units(side_len_cm, THICK_SCALE)
+        if np is not None:
+            ids = table._np_ids()
+            return table._np_view(ids[np.frombuffer(table.thickness, dtype=np.int64)[ids] <= limit])
+        thick = table.thickness
+        return table.view([b for b in table.ids() if thick[b] <= limit])
+
+    def at(self, len_pair: float, len_conn: float) -> ModeResults:
+        # What enumerate_all_modes(plates, len_pair, len_conn) returns, for lengths up to the searched one
+        pair, single = self.table("pair", len_pair), self.table("single", len_pair)
+        conn = self.table("connector", len_conn)
+        return ModeResults(pair, conn, single, searched=self.results.searched, served=len(pair) + len(conn) + len(single))
+
+class IncrementalPlanner:
+    # Keeps the last shared enumeration and, when only plate counts and/or side
+    # lengths changed, updates it instead of searching from scratch: old combos
+    # that still fit are kept, and a delta search visits only the subtrees that can
+    # hold a combo the old search did not produce. Results equal enumerate_all_modes.
+    def __init__(self, include_zero: bool = False):
+        self.include_zero = include_zero
+        self.stream: Optional[AllModesStream] = None
+        self.last_update = ""  # "full" or "incremental"
+        self._inventory = None
+
+    @staticmethod
+    def _rows(plates: List[PlateType]):
+        return [(p.weight, p.thickness, p.label) for p in plates]
+
+    def can_update(self, plates: List[PlateType]) -> bool:
+        # Same rows apart from counts, and the same plate classes in the same order
+        if self.stream is None or self._rows(plates) != self._inventory:
+            return False
+        return _prepare(plates, 2).members == self.stream.space.members
+
+    def adopt(self, stream: AllModesStream):
+        # Take over a finished (not cancelled) full search, e.g. one streamed to the GUI
+        assert stream.include_zero == self.include_zero, "include_zero must match"
+        self.stream = stream
+        self._inventory = self._rows(stream.space.plates)
+        self.last_update = "full"
+
+    def update(
+        self,
+        plates: List[PlateType],
+        len_pair: float,
+        len_conn: float,
+        progress: Optional[ProgressCallback] = None,
+        stats: Optional[SearchStats] = None,
+    ) -> ModeResults:
+        stream = AllModesStream(plates, len_pair, len_conn, self.include_zero, progress=progress, stats=stats)
+        if not self.can_update(plates):
+            result = stream.run()
+            self.adopt(stream)
+            return result
+        stream.stats.engine = "incremental"
+        self._carry(self.stream, stream)
+        self.stream = stream
+        self._inventory = self._rows(plates)
+        self.last_update = "incremental"
+        return stream.result(by_counts=True)
+
+    def _carry(self, old: AllModesStream, new: AllModesStream):
+        space, table = new.space, new.table
+        limit = new.limit
+        caps, n = space.caps, len(space.types)
+        src = old.table
+        # Old combos that still fit the new caps and side length; stored thickness
+        # is exact, so the length test is one comparison
+        with new.stats.phase("carry"):
+            if np is not None and n:
+                counts = np.frombuffer(src.counts, dtype=src.counts.typecode).reshape(-1, n).astype(np.int64)
+                thick = np.frombuffer(src.thickness, dtype=np.int64)
+                ok = (counts <= np.array(caps, dtype=np.int64)).all(axis=1) & (thick <= limit)
+                table.extend(counts[ok], np.frombuffer(src.weights, dtype=np.int64)[ok], thick[ok],
+                             new._block_bits(counts[ok], thick[ok]))
+            else:
+                for b in range(len(src.weights)):
+                    c, t = src.class_counts(b), src.thickness[b]
+                    if t <= limit and all(k <= cap for k, cap in zip(c, caps)):
+                        table.append(c, src.weights[b], t, new._bits(c, t))
+        new.stats.carried = new.tracker.found = len(table)
+        with new.stats.phase("search"):
+            for leaf in _iter_delta(space, old.space.caps, limit, old.limit, new.include_zero, new.tracker):
+                new._add(leaf)
+        new.tracker.report()
+
+def _iter_delta(
+    space: _Space,
+    old_caps: List[int],
+    limit: int,
+    old_limit: int,
+    include_zero: bool,
+    tracker: "_Tracker",
+) -> Iterator[Tuple[Tuple[int, ...], int, int]]:
+    # Leaves of the search at (space.caps, limit) that the search at (old_caps,
+    # old_limit) did not produce; limits in THICK_SCALE units. The old bounds are
+    # replayed along each path, so "was it found before" is exact; a subtree is
+    # skipped when every leaf below it must have been found before.
+    ws, ts, caps = space.ws, space.ts, space.caps
+    n_types = len(ts)
+    grows_below = [False] * (n_types + 1)  # some type at or after i got a higher cap
+    room_below = [0] * (n_types + 1)       # thickest possible completion from type i on
+    for i in range(n_types - 1, -1, -1):
+        grows_below[i] = grows_below[i + 1] or caps[i] > old_caps[i]
+        room_below[i] = room_below[i + 1] + caps[i] * ts[i]
+    stack = [(0, 0, 0, (), old_limit >= 0)]
+    nodes = pruned = 0
+    while stack:
+        i, used_thick, side_weight, counts, was_old = stack.pop()
+        nodes += 1
+        if nodes == PROGRESS_EVERY:
+            tracker.nodes += nodes
+            tracker.pruned += pruned
+            nodes = pruned = 0
+            tracker.report()
+        if used_thick > limit:
+            pruned += 1
+            continue
+        if was_old and used_thick > old_limit:
+            was_old = False
+        if was_old and not grows_below[i] and (limit <= old_limit or used_thick + room_below[i] <= old_limit):
+            continue
+        if i == n_types:
+            if not was_old and (include_zero or side_weight > 0):
+                tracker.found += 1
+                yield counts, used_thick, side_weight
+            continue
+        t = ts[i]
+        max_by_len = (limit - used_thick) // t
+        if max_by_len < caps[i]:
+            pruned += caps[i] - max_by_len
+        hi = min(caps[i], max_by_len)
+        old_hi = min(old_caps[i], (old_limit - used_thick) // t) if was_old else -1
+        for n in range(hi + 1):
+            stack.append((i + 1, used_thick + n * t, side_weight + n * ws[i], counts + (n,), n <= old_hi))
+    tracker.nodes += nodes
+    tracker.pruned += pruned
+
+ENGINES = ("auto", "dfs", "numpy", "frontier")
+
+# engine="auto" walks the NumPy grid when the full count grid has at most
+# GRID_MAX_POINTS points and, judging by a fixed sample, at least GRID_MIN_DENSITY
+# of them fit the side length (below that the DFS, which never visits the
+# overlong part, is faster). GRID_BLOCK points are evaluated at a time.
+GRID_MAX_POINTS = 1 << 22
+GRID_MIN_DENSITY = 0.1
+GRID_SAMPLE = 1024
+GRID_BLOCK = 1 << 16
+
+# With workers > 1 a count grid this small is still walked serially when the grid
+# engine takes it: that finishes faster than a process pool starts up.
+PARALLEL_MIN_POINTS = 1 << 20
+
+def _use_grid(space: _Space, limit: int, engine: str) -> bool:
+    if engine == "numpy":
+        assert np is not None, "engine='numpy' needs NumPy"
+        return True
+    return engine == "auto" and _grid_fits(space, limit)
+
+def _leaf_engine(space: _Space, limit: int, workers: Optional[int], engine: str) -> str:
+    # Which search _search_leaves runs: "numpy", "parallel" or "dfs". Parallel
+    # subtrees pick the grid or the DFS for themselves (see _subtree_columns).
+    if workers and workers > 1 and len(space.types) > 1:
+        if _grid_size(space, limit) > PARALLEL_MIN_POINTS or not _use_grid(space, limit, engine):
+            return "parallel"
+    if _use_grid(space, limit, engine):
+        return "numpy"
+    return "dfs"
+
+def _search_leaves(
+    space: _Space,
+    limit: int,
+    include_zero: bool,
+    workers: Optional[int] = None,
+    tracker: Optional["_Tracker"] = None,
+    engine: str = "dfs",
+) -> Iterator[Tuple[Tuple[int, ...], int, int]]:
+    # (class counts, per-side thickness units, side weight in grams) of every combo
+    # within `limit` thickness units, in DFS order
+    tracker = tracker or _Tracker()
+    how = _leaf_engine(space, limit, workers, engine)
+    if how == "numpy":
+        for counts, used, side in _grid_blocks(space, limit, include_zero, tracker):
+            for c, t, w in zip(counts.tolist(), used.tolist(), side.tolist()):
+                yield tuple(c), t, w
+    elif how == "parallel":
+        n = len(space.types)
+        for counts, thick, weights in _parallel_columns(space, limit, include_zero, workers, tracker, engine):
+            for r in range(len(thick)):
+                yield tuple(counts[r * n:(r + 1) * n]), thick[r], weights[r] // 2
+    else:
+        yield from _iter_subtree(space.ws, space.ts, space.caps, limit, include_zero, (), tracker)
+    tracker.report()
+
+def _grid_radices(space: _Space, limit: int) -> List[int]:
+    # Values each class count can take on its own (0..cap, capped by the side length)
+    return [max(min(cap, limit // t) + 1, 0) for t, cap in zip(space.ts, space.caps)]
+
+def _grid_size(space: _Space, limit: int) -> int:
+    size = 1
+    for r in _grid_radices(space, limit):
+        size *= r
+    return size
+
+def _grid_fits(space: _Space, limit: int) -> bool:
+    if np is None or not space.types:
+        return False
+    size = _grid_size(space, limit)
+    if size == 0 or size > GRID_MAX_POINTS:
+        return False
+    radices = _grid_radices(space, limit)
+    sample = np.random.default_rng(0).integers(0, radices, size=(GRID_SAMPLE, len(radices)))
+    thick = sample @ np.array(space.ts, dtype=np.int64)
+    return np.count_nonzero(thick <= limit) >= GRID_MIN_DENSITY * GRID_SAMPLE
+
+def _grid_blocks(space: _Space, limit: int, include_zero: bool, tracker: "_Tracker"):
+    # Vectorised enumeration: the mixed-radix grid of count vectors is decoded in
+    # blocks, counts high→low so rows come out in DFS leaf order, and the length
+    # test is applied as a mask, so the surviving rows are exactly the DFS leaves.
+    # Yields (counts, per-side thickness, side weight) arrays of each block's survivors.
+    if limit < 0:
+        return
+    radices = _grid_radices(space, limit)
+    strides = [1] * len(radices)
+    for j in range(len(radices) - 2, -1, -1):
+        strides[j] = strides[j + 1] * radices[j + 1]
+    total = strides[0] * radices[0] if radices else 1
+    for start in range(0, total, GRID_BLOCK):
+        g = np.arange(start, min(start + GRID_BLOCK, total), dtype=np.int64)
+        counts = np.empty((len(g), len(radices)), dtype=np.int64)
+        for j, (radix, stride) in enumerate(zip(radices, strides)):
+            counts[:, j] = (radix - 1) - (g // stride) % radix
+        ok, used, side = _length_mask(space, counts, limit)
+        tracker.pruned += len(g) - int(np.count_nonzero(ok))
+        if not include_zero:
+            ok &= side > 0
+        tracker.nodes += len(g)
+        tracker.found += int(ok.sum())
+        yield counts[ok], used[ok], side[ok]
+        tracker.report()  # only after the block is delivered, so a cancel never counts undelivered rows
+
+def _length_mask(space: _Space, counts, limit: int):
+    # The DFS length test over a NumPy block of count rows; returns (fits,
+    # per-side thickness, side weight). Integer sums are exact in any order, so
+    # the per-type tests along a path reduce to the total.
+    used = counts @ np.array(space.ts, dtype=np.int64)
+    side = counts @ np.array(space.ws, dtype=np.int64)
+    return used <= limit, used, side
+
+def _iter_subtree(
+    ws: List[int],
+    ts: List[int],
+    caps: List[int],
+    limit: int,
+    include_zero: bool,
+    prefix: Tuple[int, ...],
+    tracker: "_Tracker",
+) -> Iterator[Tuple[Tuple[int, ...], int, int]]:
+    # DFS below a fixed count prefix, counts high→low; explicit stack so it can stream
+    used_thick = sum(n * t for n, t in zip(prefix, ts))
+    side_weight = sum(n * w for n, w in zip(prefix, ws))
+    n_types = len(ts)
+    stack = [(len(prefix), used_thick, side_weight, tuple(prefix))]
+    nodes = pruned = 0
+    while stack:
+        i, used_thick, side_weight, counts = stack.pop()
+        nodes += 1
+        if nodes == PROGRESS_EVERY:
+            tracker.nodes += nodes
+            tracker.pruned += pruned
+            nodes = pruned = 0
+            tracker.report()
+        if used_thick > limit:
+            pruned += 1
+            continue
+        if i == n_types:
             if include_zero or side_weight > 0:
-                per_side_counts = {idx_map[j]: counts[j] for j in range(len(counts)) if counts[j] > 0}
-                total = side_weight * 2.0
-                results.append(ComboResult(
-                    total_weight=_round(total, 3),
-                    per_side_thickness=_round(used_thick, 3),
-                    per_side_counts=per_side_counts,
-                    note=_make_note(plates, per_side_counts)
-                ))
-            return
-        p = f_plates[i]
-        max_by_len = int((side_len_cm - used_thick + 1e-9) // p.thickness)
-        hi = min(f_caps[i], max_by_len)
-        for n in range(hi, -1, -1):
-            counts.append(n)
-            dfs(i + 1, used_thick + n * p.thickness, side_weight + n * p.weight, counts)
-            counts.pop()
-
-    dfs(0, 0.0, 0.0, [])
-
-    # Dedup
-    seen = set()
-    out: List[ComboResult] = []
-    for r in results:
-        key = (r.total_weight, r.per_side_thickness, tuple(sorted(r.per_side_counts.items())))
-        if key not in seen:
-            seen.add(key)
-            out.append(r)
-    out.sort(key=lambda r: (-r.total_weight, r.per_side_thickness))
+                tracker.found += 1
+                yield counts, used_thick, side_weight
+            continue
+        t, w = ts[i], ws[i]
+        max_by_len = (limit - used_thick) // t
+        if max_by_len < caps[i]:
+            pruned += caps[i] - max_by_len
+            hi = max_by_len
+        else:
+            hi = caps[i]
+        for n in range(hi + 1):  # pushed low→high so the highest count is explored first
+            stack.append((i + 1, used_thick + n * t, side_weight + n * w, counts + (n,)))
+    tracker.nodes += nodes
+    tracker.pruned += pruned
+
+def _subtree_columns(
+    space: _Space,
+    limit: int,
+    include_zero: bool,
+    prefix: Tuple[int, ...],
+    engine: str,
+) -> Tuple[bytes, bytes, bytes, int, int]:
+    # Process-pool task: module level so it pickles. The leaves below one count
+    # prefix as packed ComboTable columns (counts "H" row-major, per-side thickness
+    # and total weight "q"), so only a few byte strings travel back to the parent,
+    # plus (nodes visited, branches pruned). The rest of the counts runs on the grid
+    # when engine allows and it fits, otherwise on the DFS; both keep DFS order.
+    tracker = _Tracker()
+    depth = len(prefix)
+    used = sum(n * t for n, t in zip(prefix, space.ts))
+    side = sum(n * w for n, w in zip(prefix, space.ws))
+    rest = replace(space, types=space.types[depth:], caps=space.caps[depth:], members=space.members[depth:],
+                   ws=space.ws[depth:], ts=space.ts[depth:])
+    if engine != "dfs" and rest.types and _use_grid(rest, limit - used, engine):
+        parts = []
+        for c, t, w in _grid_blocks(rest, limit - used, True, tracker):
+            ok = np.ones(len(c), dtype=bool) if include_zero else side + w > 0
+            rows = np.empty((int(ok.sum()), len(space.types)), dtype=np.uint16)
+            rows[:, :depth] = prefix
+            rows[:, depth:] = c[ok]
+            parts.append((rows.tobytes(), (used + t[ok]).tobytes(), (2 * (side + w[ok])).tobytes()))
+        return (b"".join(p[0] for p in parts), b"".join(p[1] for p in parts), b"".join(p[2] for p in parts),
+                tracker.nodes, tracker.pruned)
+    counts, thick, weights = array("H"), array("q"), array("q")
+    for c, t, w in _iter_subtree(space.ws, space.ts, space.caps, limit, include_zero, prefix, tracker):
+        counts.extend(c)
+        thick.append(t)
+        weights.append(2 * w)
+    return counts.tobytes(), thick.tobytes(), weights.tobytes(), tracker.nodes, tracker.pruned
+
+def _split_prefixes(ts: List[int], caps: List[int], limit: int, min_tasks: int,
+                    tracker: Optional["_Tracker"] = None):
+    # Fix the counts of the first few (thickest) types until there are enough subtrees.
+    # The expanded prefixes are counted on tracker as the serial DFS would count them.
+    tracker = tracker or _Tracker()
+    prefixes = [((), 0)]
+    depth = 0
+    while len(prefixes) < min_tasks and depth < len(ts) - 1:
+        t = ts[depth]
+        nxt = []
+        tracker.nodes += len(prefixes)
+        for prefix, used in prefixes:
+            hi = min(caps[depth], (limit - used) // t)
+            tracker.pruned += caps[depth] - hi
+            for n in range(hi, -1, -1):
+                nxt.append((prefix + (n,), used + n * t))
+        prefixes = nxt
+        depth += 1
+    return prefixes
+
+def _parallel_columns(space: _Space, limit: int, include_zero: bool, workers: int, tracker: "_Tracker",
+                      engine: str = "auto") -> Iterator[Tuple[array, array, array]]:
+    # (counts, per-side thickness, total weight) column arrays of each subtree, in
+    # serial DFS order; see _subtree_columns
+    ws, ts, caps = space.ws, space.ts, space.caps
+    prefixes = _split_prefixes(ts, caps, limit, workers * 8, tracker)
+
+    def estimate(prefix: Tuple[int, ...], used: int) -> int:
+        # Grid size of the subtree, ignoring the shared length budget
+        size = 1
+        for t, cap in zip(ts[len(prefix):], caps[len(prefix):]):
+            size *= min(cap, (limit - used) // t) + 1
+        return size
+
+    # Largest subtrees are queued first so no heavy one is left for last; results are
+    # stitched back in prefix order, which is exactly the serial DFS order.
+    heavy_first = sorted(range(len(prefixes)), key=lambda k: -estimate(*prefixes[k]))
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {k: pool.submit(_subtree_columns, space, limit, include_zero, prefixes[k][0], engine)
+                   for k in heavy_first}
+        for k in range(len(prefixes)):
+            counts_b, thick_b, weights_b, nodes, pruned = futures[k].result()
+            counts, thick, weights = array("H"), array("q"), array("q")
+            counts.frombytes(counts_b)
+            thick.frombytes(thick_b)
+            weights.frombytes(weights_b)
+            tracker.nodes += nodes
+            tracker.pruned += pruned
+            tracker.found += len(thick)
+            yield counts, thick, weights
+            tracker.report()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+def _frontier_combos(
+    space: _Space,
+    side_len_cm: float,
+    include_zero: bool,
+    per_weight: int,
+    tracker: _Tracker,
+) -> ComboTable:
+    # Layered DP over plate types. A state is (thickness, -counts) and only the
+    # `per_weight` best states per reachable side weight survive each layer: any
+    # completion of a dropped state is dominated by the same completion of a kept
+    # one, so the survivors at the end are exactly the DFS's best per weight.
+    # Ties on thickness prefer higher counts first, which is the DFS visit order.
+    assert per_weight >= 1, "per_weight must be >= 1"
+    limit = _units(side_len_cm, THICK_SCALE)
+    f_caps, ws, ts = space.caps, space.ws, space.ts
+
+    states: Dict[int, List[Tuple[int, Tuple[int, ...]]]] = {0: [(0, ())]} if limit >= 0 else {}
+    for i in range(len(space.types)):
+        nxt: Dict[int, List[Tuple[int, Tuple[int, ...]]]] = {}
+        for w, entries in states.items():
+            tracker.nodes += len(entries)
+            for t, key in entries:
+                hi = min(f_caps[i], (limit - t) // ts[i])
+                tracker.pruned += f_caps[i] - hi
+                for n in range(hi, -1, -1):
+                    nxt.setdefault(w + n * ws[i], []).append((t + n * ts[i], key + (-n,)))
+        for entries in nxt.values():
+            if len(entries) > per_weight:
+                entries.sort()
+                del entries[per_weight:]
+        states = nxt
+        tracker.report()
+
+    tracker.found = sum(len(v) for w, v in states.items() if w or include_zero)
+    tracker.report()
+    out = ComboTable(space)
+    for w in sorted(states, reverse=True):
+        if w == 0 and not include_zero:
+            continue
+        for t, key in sorted(states[w]):
+            out.append([-c for c in key], 2 * w, t)
     return out
+
+ORDERS = ("weight_desc", "weight_asc", "thickness_asc", "dfs")
+
+def _remaining_bound(ws: List[int], ts: List[int], caps: List[int]):
+    # ub(i, room): fractional-knapsack upper bound on the side weight that plate
+    # types i.. can still add within `room` thickness units.
+    suffix = []
+    for i in range(len(ws) + 1):
+        items = sorted(range(i, len(ws)), key=lambda j: -ws[j] / ts[j])
+        suffix.append([(ws[j], ts[j], caps[j]) for j in items])
+
+    def ub(i: int, room: int) -> int:
+        total = 0
+        for w, t, cap in suffix[i]:
+            n = min(cap, room // t)
+            total += n * w
+            room -= n * t
+            if n < cap:
+                return total + (room * w) // t
+        return total
+    return ub
+
+def iter_symmetric_combos(
+    plates: List[PlateType],
+    side_len_cm: float,
+    mode: str = "pair",
+    include_zero: bool = False,
+    order: str = "weight_desc",             # one of ORDERS; "dfs" streams in search order
+    top_k: Optional[int] = None,
+    min_weight: Optional[float] = None,     # bounds on ComboResult.total_weight (kg)
+    max_weight: Optional[float] = None,
+    max_thickness: Optional[float] = None,  # per side (cm), on top of side_len_cm
+    progress: Optional[ProgressCallback] = None,
+    stats: Optional[SearchStats] = None,    # filled as the stream is consumed (and when it is closed)
+) -> Iterator[ComboResult]:
+    assert mode in ("pair", "connector", "single"), "mode must be 'pair', 'connector', or 'single'"
+    assert order in ORDERS, f"order must be one of {ORDERS}"
+    tracker = _Tracker(progress)
+    combos = _iter_combos(plates, side_len_cm, mode, include_zero, order, top_k, min_weight, max_weight,
+                          max_thickness, tracker)
+    if stats is None:
+        return combos
+
+    def counted():
+        try:
+            yield from _timed(combos, stats, "search")
+        finally:
+            stats._count(tracker, tracker.found)
+
+    stats.engine = "dfs" if order == "dfs" else "best_first"
+    return counted()
+
+def _iter_combos(
+    plates: List[PlateType],
+    side_len_cm: float,
+    mode: str,
+    include_zero: bool,
+    order: str,
+    top_k: Optional[int],
+    min_weight: Optional[float],
+    max_weight: Optional[float],
+    max_thickness: Optional[float],
+    tracker: _Tracker,
+) -> Iterator[ComboResult]:
+    factor = 4 if mode == "pair" else 2
+
+    space = _prepare(plates, factor)
+    if not space.types and not include_zero:
+        return
+    limit = _units(side_len_cm, THICK_SCALE)
+    if max_thickness is not None:
+        limit = min(limit, _units(max_thickness, THICK_SCALE))
+    if limit < 0 or top_k is not None and top_k <= 0:
+        return
+    # Weight filters act on the side weight: total_weight is twice the side weight
+    lo = -(-_units(min_weight, WEIGHT_SCALE) // 2) if min_weight is not None else 0
+    hi = _units(max_weight, WEIGHT_SCALE) // 2 if max_weight is not None else None
+    n_types = len(space.types)
+    f_caps, ws, ts = space.caps, space.ws, space.ts
+    ub = _remaining_bound(ws, ts, f_caps)
+
+    def children(i: int, t: int, w: int):
+        # Counts high→low, as in enumerate_symmetric_combos; skips pruned branches
+        hi_n = min(f_caps[i], (limit - t) // ts[i])
+        tracker.pruned += f_caps[i] - hi_n
+        for n in range(hi_n, -1, -1):
+            cw, ct = w + n * ws[i], t + n * ts[i]
+            if hi is not None and cw > hi:
+                continue
+            if lo > 0 and cw + ub(i + 1, limit - ct) < lo:  # the bound can only prune with a min_weight
+                continue
+            yield n, ct, cw
+
+    def build(neg: Tuple[int, ...], t: int, w: int) -> ComboResult:
+        return space.build([-c for c in neg], 2 * w, t)
+
+    def accept(w: int) -> bool:
+        return (include_zero or w > 0) and w >= lo and (hi is None or w <= hi)
+
+    def visit():
+        tracker.nodes += 1
+        if tracker.nodes % PROGRESS_EVERY == 0:
+            tracker.report()
+
+    if order == "dfs":
+        stack = [(0, 0, ())]
+        while stack:
+            t, w, neg = stack.pop()
+            visit()
+            if len(neg) == n_types:
+                if accept(w):
+                    tracker.found += 1
+                    yield build(neg, t, w)
+                    if tracker.found == top_k:
+                        break
+                continue
+            kids = [(ct, cw, neg + (-n,)) for n, ct, cw in children(len(neg), t, w)]
+            stack.extend(reversed(kids))
+        tracker.report()
+        return
+
+    # Best-first search: a node's key never exceeds the key of any completed combo
+    # below it, so combos leave the heap exactly in the requested order.
+    def key(t: int, w: int, i: int):
+        if order == "weight_asc":
+            return (w, t)
+        best = w + ub(i, limit - t) if i < n_types else w
+        if hi is not None:
+            best = min(best, hi)
+        return (-best, t) if order == "weight_desc" else (t, -best)
+
+    heap = [key(0, 0, 0) + ((), 0, 0)]
+    while heap:
+        _, _, neg, t, w = heapq.heappop(heap)
+        visit()
+        i = len(neg)
+        if i == n_types:
+            if accept(w):
+                tracker.found += 1
+                yield build(neg, t, w)
+                if tracker.found == top_k:
+                    break
+            continue
+        for n, ct, cw in children(i, t, w):
+            heapq.heappush(heap, key(ct, cw, i + 1) + (neg + (-n,), ct, cw))
+    tracker.report()
+
+def _with_bar_units(mode: str, total_weight: int, bar_weight: int) -> int:
+    # pair: two dumbbells, each with its own bar; connector/single: one bar
+    if mode == "pair":
+        return 2 * total_weight + 2 * bar_weight
+    return total_weight + bar_weight
+
+def with_bar_weight(mode: str, total_weight: float, bar_weight: float) -> float:
+    return _with_bar_units(mode, _units(total_weight, WEIGHT_SCALE), _units(bar_weight, WEIGHT_SCALE)) / WEIGHT_SCALE
+
+class WeightIndex:
+    # Sorted weights of one result list, held in grams; queries take kg and
+    # return positions in that list
+    def __init__(self, weights: Sequence[float]):
+        self._index([_units(w, WEIGHT_SCALE) for w in weights])
+
+    def _index(self, grams: List[int]):
+        if np is not None:
+            order = np.argsort(np.asarray(grams, dtype=np.int64), kind="stable").tolist()
+        else:
+            order = sorted(range(len(grams)), key=grams.__getitem__)
+        self.weights = [grams[i] for i in order]
+        self.positions = order
+
+    @classmethod
+    def for_results(cls, results: Sequence[ComboResult], mode: str, bar_weight: Optional[float] = None) -> "WeightIndex":
+        # bar_weight=None indexes plate weights only, otherwise the with-bar weight of `mode`
+        if isinstance(results, ComboTable):
+            grams = results.weight_units()
+        else:
+            grams = [_units(r.total_weight, WEIGHT_SCALE) for r in results]
+        if bar_weight is not None:
+            bar = _units(bar_weight, WEIGHT_SCALE)
+            grams = [_with_bar_units(mode, g, bar) for g in grams]
+        index = cls.__new__(cls)
+        index._index(grams)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def range(self, lo: float, hi: float) -> List[int]:
+        a = bisect_left(self.weights, _units(lo, WEIGHT_SCALE))
+        b = bisect_right(self.weights, _units(hi, WEIGHT_SCALE))
+        return sorted(self.positions[a:b])
+
+    def exact(self, target: float) -> List[int]:
+        return self.range(target, target)
+
+    def within(self, target: float, tolerance: float) -> List[int]:
+        return self.range(target - tolerance, target + tolerance)
+
+    def nearest(self, target: float) -> Tuple[List[int], float]:
+        # Positions of every result at the smallest distance (on either side) and that distance
+        if not self.weights:
+            return [], float("inf")
+        goal = _units(target, WEIGHT_SCALE)
+        i = bisect_left(self.weights, goal)
+        dist = min(abs(self.weights[j] - goal) for j in (i - 1, i) if 0 <= j < len(self.weights))
+        a = bisect_left(self.weights, goal - dist)
+        b = bisect_right(self.weights, goal + dist)
+        return sorted(self.positions[a:b]), dist / WEIGHT_SCALE
+
+def solve_for_target(
+    plates: List[PlateType],
+    side_len_cm: float,
+    mode: str,
+    target: float,          # with-bar weight (kg), as shown in the result tables
+    bar_weight: float,
+    k: int = 5,
+    progress: Optional[ProgressCallback] = None,
+) -> ComboTable:
+    # The k combos whose with-bar weight is closest to target, without enumerating
+    # everything. Ranked by distance, then thinner, then heavier, then DFS order.
+    assert mode in ("pair", "connector", "single"), "mode must be 'pair', 'connector', or 'single'"
+    factor = 4 if mode == "pair" else 2
+    space = _prepare(plates, factor)
+    limit = _units(side_len_cm, THICK_SCALE)
+    table = ComboTable(space)
+    if not space.types or k <= 0 or limit < 0:
+        return table
+    # with-bar weight = mult * side weight + offset (grams)
+    mult = 4 if mode == "pair" else 2
+    offset = _with_bar_units(mode, 0, _units(bar_weight, WEIGHT_SCALE))
+    goal = _units(target, WEIGHT_SCALE)
+    n_types = len(space.types)
+    caps, ws, ts = space.caps, space.ws, space.ts
+    ub = _remaining_bound(ws, ts, caps)
+    # Per suffix: the densest type (thinnest way to add weight) and the gcd of the
+    # weights, since only w + multiples of that gcd are reachable below a node
+    densest = [None] * (n_types + 1)
+    step = [0] * (n_types + 1)
+    for i in range(n_types - 1, -1, -1):
+        best = densest[i + 1]
+        densest[i] = (ws[i], ts[i]) if best is None or ws[i] * best[1] > best[0] * ts[i] else best
+        step[i] = gcd(step[i + 1], ws[i])
+
+    tracker = _Tracker(progress)
+    best: List[Tuple[int, int, int, Tuple[int, ...]]] = []  # sorted (dist, thick, -weight, -counts)
+
+    def bound(i: int, t: int, w: int) -> Tuple[int, int]:
+        # Lower bounds on (distance, thickness) of any combo below this node
+        g = step[i] or 1
+        room = ub(i, limit - t) // g  # at most this many more weight steps
+        exact = (goal - offset - mult * w) / (mult * g)
+        dist = min(abs(mult * (w + j * g) + offset - goal)
+                   for j in (min(max(floor(exact), 0), room), min(max(ceil(exact), 0), room)))
+        thick = t
+        if len(best) == k and densest[i] is not None:
+            need = -(-(goal - best[-1][0] - offset) // mult) - w  # side weight still missing
+            if need > 0:
+                dw, dt = densest[i]
+                thick += -(-need * dt // dw)
+        return dist, thick
+
+    stack = [(0, 0, 0, ())]
+    while stack:
+        i, t, w, counts = stack.pop()
+        tracker.nodes += 1
+        if tracker.nodes % PROGRESS_EVERY == 0:
+            tracker.report()
+        if i == n_types:
+            if w == 0:
+                continue
+            key = (abs(mult * w + offset - goal), t, -w, tuple(-c for c in counts))
+            if len(best) < k or key < best[-1]:
+                insort(best, key)
+                del best[k:]
+            continue
+        if len(best) == k and bound(i, t, w) > best[-1][:2]:
+            continue
+        for n in range(min(caps[i], (limit - t) // ts[i]) + 1):
+            stack.append((i + 1, t + n * ts[i], w + n * ws[i], counts + (n,)))
+
+    tracker.found = len(best)
+    tracker.report()
+    for _, t, nw, neg in best:
+        table.append([-c for c in neg], -2 * nw, t, MODE_BITS[mode])
+    return table
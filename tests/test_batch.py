@@ -0,0 +1,52 @@
+import csv
+import json
+import os
+
+from batch import load_inventory, main
+from export import export_results
+from planner import enumerate_symmetric_combos, with_bar_weight
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_JSON = os.path.join(ROOT, "sample_inventory.json")
+
+def test_batch_writes_one_file_per_job(tmp_path, capsys):
+    other = tmp_path / "small.json"
+    other.write_text(json.dumps([{"weight": 2.0, "thickness": 2.0, "count": 8}, {"weight": 0, "thickness": 1, "count": 4}]),
+                     encoding="utf-8")
+    out = tmp_path / "out"
+    code = main([SAMPLE_JSON, str(other), "--len-pair", "21", "15", "--modes", "pair", "connector",
+                 "--format", "jsonl", "--out-dir", str(out), "--workers", "2"])
+    assert code == 0
+    summaries = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    # 2 份清单 ×（pair 两个长度 + connector 一个长度）
+    assert len(summaries) == 6
+    plates = load_inventory(SAMPLE_JSON)
+    expected = enumerate_symmetric_combos(plates, 15.0, mode="pair")
+    rows = [json.loads(line) for line in (out / "sample_inventory-pair-15cm.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [(r["total_weight"], r["per_side_thickness"], r["note"]) for r in rows] == \
+        [(r.total_weight, r.per_side_thickness, r.note) for r in expected]
+    assert rows[0]["with_bar"] == round(with_bar_weight("pair", expected[0].total_weight, 0.365), 3)
+    # 无效行（重量为 0）被跳过，与界面一致
+    assert load_inventory(str(other))[0].weight == 2.0 and len(load_inventory(str(other))) == 1
+
+def test_batch_top_k_csv(tmp_path, capsys):
+    code = main([SAMPLE_JSON, "--modes", "single", "--out-dir", str(tmp_path / "missing" / "x"), "--workers", "1",
+                 "--top-k", "3"])
+    assert code == 0
+    path = tmp_path / "missing" / "x" / "sample_inventory-single-21cm.csv"
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        assert len(list(csv.reader(f))) == 4  # 表头 + 3 行
+
+def test_export_leaves_no_partial_file(tmp_path):
+    plates = load_inventory(SAMPLE_JSON)
+
+    def broken():
+        yield from enumerate_symmetric_combos(plates, 21.0, mode="single")[:3]
+        raise RuntimeError("stop")
+
+    path = tmp_path / "out.csv"
+    try:
+        export_results(str(path), "single", broken(), 0.365)
+    except RuntimeError:
+        pass
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,30 @@
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import inventories  # noqa: E402
+import search  # noqa: E402
+
+def test_inventories_are_deterministic():
+    for family in inventories.FAMILIES:
+        plates, side_len = inventories.generate(family, 4, seed=1)
+        assert (plates, side_len) == inventories.generate(family, 4, seed=1)
+        assert plates and side_len > 0
+
+def test_search_report_and_compare(tmp_path):
+    out = tmp_path / "bench.json"
+    assert search.main(["--families", "realistic", "--sizes", "4", "--modes", "pair", "--repeat", "1",
+                        "--workers", "1", "2", "--out", str(out)]) == 0
+    report = json.loads(out.read_text(encoding="utf-8"))
+    row, pooled = report["results"]
+    # 多进程的点记录相对单进程的加速比，结果数相同
+    assert pooled["workers"] == 2 and pooled["speedup"] > 0 and pooled["results"] == row["results"]
+    assert row["results"] > 0 and row["nodes"] >= row["found"] >= row["results"] and row["peak_kib"] > 0
+    # 与基线对比：变慢超过容差或结果数不同都算回归
+    slow = dict(row, seconds=row["seconds"] + 1.0)
+    assert search.compare([slow], [row], 1.3)[0]["ratio"] > 1.3
+    assert "error" in search.compare([dict(row, results=row["results"] + 1)], [row], 1.3)[0]
+    assert search.compare([row], [row], 1.3) == []
@@ -0,0 +1,72 @@
+import gzip
+import json
+
+from cache import CACHE_FORMAT, ResultCache, cached_all_modes, cached_enumerate, inventory_key
+from planner import PlateType, SearchStats, enumerate_all_modes
+
+PLATES = [
+    PlateType(3.0, 4.0, 10, "3 kg"),
+    PlateType(2.0, 4.0, 4, "2 kg"),
+    PlateType(1.25, 3.0, 10, "1.25 kg"),
+]
+
+def test_memory_lru_hits_and_eviction():
+    cache = ResultCache(max_entries=2)
+    first = cached_enumerate(cache, PLATES, 21.0, mode="pair")
+    assert cached_enumerate(cache, PLATES, 21.0, mode="pair") is first
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    cached_enumerate(cache, PLATES, 20.0, mode="pair")
+    cached_enumerate(cache, PLATES, 19.0, mode="pair")
+    # 容量为 2：最早的条目被淘汰，再次请求会重新计算
+    cached_enumerate(cache, PLATES, 21.0, mode="pair")
+    assert cache.stats()["misses"] == 4
+
+def test_stats_are_not_part_of_the_key():
+    cache = ResultCache()
+    searched, hit = SearchStats(), SearchStats()
+    first = cached_enumerate(cache, PLATES, 21.0, stats=searched)
+    # stats 不影响缓存键；命中时不搜索，只标明结果来自缓存
+    assert cached_enumerate(cache, PLATES, 21.0, stats=hit) is first
+    assert searched.engine != "cache" and searched.raw > 0
+    assert (hit.engine, hit.results, hit.nodes) == ("cache", len(first), 0)
+
+def test_key_is_canonical():
+    assert inventory_key(PLATES, mode="pair", side_len_cm=21.0) == inventory_key(list(PLATES), side_len_cm=21.0, mode="pair")
+    changed = PLATES[:2] + [PlateType(1.25, 3.0, 12, "1.25 kg")]
+    assert inventory_key(PLATES, mode="pair") != inventory_key(changed, mode="pair")
+
+def test_disk_cache_survives_restart_and_checks_format(tmp_path):
+    want = enumerate_all_modes(PLATES, 21.0, 18.0)
+    assert cached_all_modes(ResultCache(disk_dir=str(tmp_path)), PLATES, 21.0, 18.0) == want
+    fresh = ResultCache(disk_dir=str(tmp_path))
+    assert cached_all_modes(fresh, PLATES, 21.0, 18.0) == want
+    assert fresh.stats()["disk_hits"] == 1 and fresh.stats()["misses"] == 0
+    assert [r.modes for r in fresh.get(next(iter(fresh._mem))).single] == [r.modes for r in want.single]
+    # 格式版本不符的文件视为未命中并被删除
+    for path in tmp_path.iterdir():
+        with gzip.open(path, "rb") as f:
+            head, columns = json.loads(f.readline()), f.read()
+        head["format"] = CACHE_FORMAT - 1
+        with gzip.open(path, "wb") as f:
+            f.write(json.dumps(head).encode("utf-8") + b"\n" + columns)
+    stale = ResultCache(disk_dir=str(tmp_path))
+    assert cached_all_modes(stale, PLATES, 21.0, 18.0) == want
+    assert stale.stats()["disk_hits"] == 0 and stale.stats()["misses"] == 1
+
+def test_background_writes_and_truncated_files(tmp_path):
+    want = enumerate_all_modes(PLATES, 21.0, 18.0)
+    cache = ResultCache(disk_dir=str(tmp_path), background=True)
+    assert cached_all_modes(cache, PLATES, 21.0, 18.0) == want
+    # 写盘在后台线程进行，flush 后文件才完整可读
+    cache.flush()
+    fresh = ResultCache(disk_dir=str(tmp_path))
+    assert cached_all_modes(fresh, PLATES, 21.0, 18.0) == want and fresh.stats()["disk_hits"] == 1
+    # 截断的文件视为未命中并被删除
+    (path,) = tmp_path.iterdir()
+    with gzip.open(path, "rb") as f:
+        blob = f.read()
+    with gzip.open(path, "wb") as f:
+        f.write(blob[:-10])
+    broken = ResultCache(disk_dir=str(tmp_path))
+    assert cached_all_modes(broken, PLATES, 21.0, 18.0) == want
+    assert broken.stats()["disk_hits"] == 0 and broken.stats()["misses"] == 1
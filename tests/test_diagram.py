@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_plate_layout_is_mirrored_and_cached():
+    pytest.importorskip("matplotlib")
+    pytest.importorskip("PySide6")
+    from diagram import plate_layout
+
+    plate_layout.cache_clear()
+    layout = plate_layout(((5.0, 3.0, 2), (1.25, 1.0, 1)))
+    assert [label for _, _, label in layout] == ["5 kg", "5 kg", "1.25 kg"]
+    # 每片向内缩进 min(0.2, 厚度 * 0.3) 的一半，片与片之间留缝
+    assert layout[0] == (0.1, 2.8, "5 kg")
+    assert layout[1][0] == pytest.approx(3.1)
+    assert layout[2][0] == pytest.approx(6.1)
+    plate_layout(((5.0, 3.0, 2), (1.25, 1.0, 1)))
+    assert plate_layout.cache_info().hits == 1
+
+def test_canvas_reuses_artists_and_blits():
+    pytest.importorskip("matplotlib")
+    pytest.importorskip("PySide6")
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", PYTHONPATH=ROOT)
+    code = "\n".join([
+        "from PySide6 import QtWidgets",
+        "from planner import PlateType",
+        "from diagram import PlateDiagramCanvas",
+        "app = QtWidgets.QApplication([])",
+        "plates = [PlateType(5, 3, 4), PlateType(2.5, 2, 4)]",
+        "c = PlateDiagramCanvas(); c.show()",
+        "c.draw_layout(plates, {0: 2}, 20); full = c.last_blit",
+        "coll = c.plates",
+        "c.draw_layout(plates, {0: 1, 1: 2}, 20); blit = c.last_blit",
+        "c.draw_layout(plates, {1: 1}, 15)",
+        "print(full, blit, c.last_blit, c.plates is coll, len(c.ax.patches), len(c.ax.lines),",
+        "      sum(t.get_visible() for t in c.ax.texts), c.last_draw_ms > 0)",
+    ])
+    out = subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    # 长度不变时只局部刷新；换长度时完整重画，但始终复用同一组图元
+    assert out.stdout.split()[-8:] == ["False", "True", "False", "True", "1", "3", "2", "True"]
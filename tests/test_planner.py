@@ -1,5 +1,14 @@
+import random
 from importlib import import_module
 
+import pytest
+
+import planner
+from planner import (
+    AllModesStream, IncrementalPlanner, LengthSweep, PlateType, SearchCancelled, SearchStats, WeightIndex, enumerate_all_modes, enumerate_symmetric_combos, iter_all_modes, iter_symmetric_combos, solve_for_target,
+    with_bar_weight,
+)
+
 def test_planner_module_available():
     # 基础存在性测试：确保项目内有 planner 模块可导入
     try:
@@ -7,3 +16,276 @@ def test_planner_module_available():
     except Exception as e:
         # 允许用户先合并源码后再运行 CI，这里仅做冒烟提示
         assert False, f"无法导入 planner 模块，请确认源码已包含：{e}"
+
+SAMPLE = [
+    PlateType(3.0, 4.0, 10, "3 kg"),
+    PlateType(2.5, 4.0, 2, "2.5 kg"),
+    PlateType(2.0, 4.0, 4, "2 kg"),
+    PlateType(1.5, 3.5, 2, "1.5 kg"),
+    PlateType(1.25, 3.0, 10, "1.25 kg"),
+]
+
+def _random_plates(seed, n=7):
+    rng = random.Random(seed)
+    return [
+        PlateType(rng.choice([0.5, 1.0, 1.25, 2.0, 2.5, 5.0]), rng.choice([1.0, 1.5, 2.0, 2.5, 3.5]), rng.randint(0, 12))
+        for _ in range(n)
+    ]
+
+def _best_per_weight(results, k=1):
+    # 从完整 DFS 结果中取每个重量的前 k 个（结果已按 重量降序/厚度升序 排好）
+    out, taken = [], {}
+    for r in results:
+        if taken.get(r.total_weight, 0) < k:
+            taken[r.total_weight] = taken.get(r.total_weight, 0) + 1
+            out.append(r)
+    return out
+
+def test_frontier_matches_dfs_best_per_weight():
+    cases = [(SAMPLE, 21.0)] + [(_random_plates(s), 15.0) for s in range(5)]
+    for plates, side_len in cases:
+        for mode in ("pair", "connector", "single"):
+            full = enumerate_symmetric_combos(plates, side_len, mode=mode)
+            for k in (1, 3):
+                fast = enumerate_symmetric_combos(plates, side_len, mode=mode, engine="frontier", per_weight=k)
+                assert fast == _best_per_weight(full, k)
+
+def test_iter_matches_enumerate_and_filters():
+    for plates, side_len in [(SAMPLE, 21.0), (_random_plates(7), 15.0)]:
+        for mode in ("pair", "connector", "single"):
+            full = enumerate_symmetric_combos(plates, side_len, mode=mode)
+            assert list(iter_symmetric_combos(plates, side_len, mode=mode)) == full
+            assert list(iter_symmetric_combos(plates, side_len, mode=mode, top_k=5)) == full[:5]
+            # 过滤条件下推到搜索中，结果应与事后过滤一致
+            got = iter_symmetric_combos(plates, side_len, mode=mode, min_weight=4, max_weight=12, max_thickness=9)
+            assert list(got) == [r for r in full if 4 <= r.total_weight <= 12 and r.per_side_thickness <= 9]
+
+def test_iter_other_orders():
+    full = enumerate_symmetric_combos(SAMPLE, 21.0, mode="single")
+    asc = list(iter_symmetric_combos(SAMPLE, 21.0, mode="single", order="weight_asc"))
+    assert [r.total_weight for r in asc] == sorted(r.total_weight for r in full)
+    thin = list(iter_symmetric_combos(SAMPLE, 21.0, mode="single", order="thickness_asc"))
+    assert [r.per_side_thickness for r in thin] == sorted(r.per_side_thickness for r in full)
+    raw = list(iter_symmetric_combos(SAMPLE, 21.0, mode="single", order="dfs"))
+    assert sorted(raw, key=lambda r: (-r.total_weight, r.per_side_thickness)) == full
+
+def test_all_modes_shares_one_search():
+    for plates, side_len in [(SAMPLE, 21.0), (_random_plates(3), 15.0)]:
+        for len_pair, len_conn in [(side_len, side_len), (side_len, side_len - 4), (side_len - 5, side_len)]:
+            shared = enumerate_all_modes(plates, len_pair, len_conn)
+            assert shared.pair == enumerate_symmetric_combos(plates, len_pair, mode="pair")
+            assert shared.connector == enumerate_symmetric_combos(plates, len_conn, mode="connector")
+            assert shared.single == enumerate_symmetric_combos(plates, len_pair, mode="single")
+            assert shared.served == len(shared.pair) + len(shared.connector) + len(shared.single)
+            assert all("single" in r.modes for r in shared.pair)
+
+def test_combo_table_rows_behave_like_results():
+    table = enumerate_symmetric_combos(SAMPLE, 21.0, mode="pair")
+    results = table.to_results()
+    # 行视图与 ComboResult 字段一致，可双向比较；切片与排序共享同一组列
+    assert table == results and results == table
+    assert [r.note for r in table[:5]] == [r.note for r in results[:5]]
+    assert table[-1] == results[-1] and len(table[2:9]) == 7
+    assert table[3:8].weights is table.weights
+    assert table.sorted() == table and table.unique() == table
+    assert table.total_weights() == [r.total_weight for r in results]
+
+def test_combo_table_display_order():
+    table = enumerate_symmetric_combos(SAMPLE, 21.0, mode="connector")
+    rows = list(table)
+    # 表格排序与筛选直接在整数列上完成，结果应与逐行比较一致（稳定排序）
+    by_weight = sorted(range(len(rows)), key=lambda i: -rows[i].total_weight)
+    assert list(table.order("weight", descending=True)) == by_weight
+    by_thick = sorted(range(len(rows)), key=lambda i: rows[i].per_side_thickness)
+    assert list(table.order("thickness")) == by_thick
+    for text in ("kg×2", "1.25", "（空）", "不存在"):
+        assert list(table.order(None, text=text)) == [i for i, r in enumerate(rows) if text.lower() in r.note.lower()]
+    # 不用 NumPy 的路径（流式接收中的行）给出相同的顺序
+    for by in ("weight", "thickness", "plan", None):
+        for text in ("", "kg×2", "kg + 2"):
+            assert list(table.order(by, True, text, vectorised=False)) == list(table.order(by, True, text))
+
+def test_equivalent_rows_are_merged():
+    # 同重量同厚度、不同批次/标签的杠片应合并为一类，数量合并计算
+    split = [
+        PlateType(2.5, 3.0, 2, "2.5 kg A"),
+        PlateType(1.25, 2.0, 8),
+        PlateType(2.5, 3.0, 2, "2.5 kg B"),
+        PlateType(2.5, 3.0, 4, "2.5 kg C"),
+    ]
+    merged = [PlateType(2.5, 3.0, 8), PlateType(1.25, 2.0, 8)]
+    for mode in ("pair", "connector", "single"):
+        got = enumerate_symmetric_combos(split, 15.0, mode=mode)
+        want = enumerate_symmetric_combos(merged, 15.0, mode=mode)
+        assert [(r.total_weight, r.per_side_thickness) for r in got] == [(r.total_weight, r.per_side_thickness) for r in want]
+        factor = 4 if mode == "pair" else 2
+        for r, w in zip(got, want):
+            # 展开回原始行后，每侧片数之和不变
+            assert sum(n for i, n in r.per_side_counts.items() if i != 1) == w.per_side_counts.get(0, 0)
+            assert r.per_side_counts.get(1, 0) == w.per_side_counts.get(1, 0)
+            assert sum(r.per_side_counts.values()) * factor <= sum(p.count for p in split)
+    # 两行各 2 片凑成配对的一份时，备注标明来自哪几行，不只记在第一行名下
+    pooled = enumerate_symmetric_combos([PlateType(2.0, 3.0, 2, "A"), PlateType(2.0, 3.0, 2, "B")], 20.0, mode="pair")
+    assert [r.note for r in pooled] == ["A/B×1（合并）"] and pooled.to_results()[0].note == "A/B×1（合并）"
+
+def test_parallel_matches_serial(monkeypatch):
+    plates = _random_plates(11, n=8)
+    for mode in ("pair", "single"):
+        assert enumerate_symmetric_combos(plates, 15.0, mode=mode, workers=2) == enumerate_symmetric_combos(plates, 15.0, mode=mode)
+    assert enumerate_all_modes(SAMPLE, 21.0, 18.0, workers=2) == enumerate_all_modes(SAMPLE, 21.0, 18.0)
+    # 小网格也强制走进程池：子树各自选网格或 DFS，按列打包传回，结果与模式标记不变
+    monkeypatch.setattr(planner, "PARALLEL_MIN_POINTS", 0)
+    stats = SearchStats()
+    assert enumerate_symmetric_combos(plates, 15.0, mode="single", workers=2, stats=stats) == enumerate_symmetric_combos(plates, 15.0, mode="single")
+    assert stats.engine == "parallel"
+    pooled, serial = enumerate_all_modes(SAMPLE, 21.0, 18.0, workers=2), enumerate_all_modes(SAMPLE, 21.0, 18.0)
+    assert pooled == serial and [r.modes for r in pooled.single] == [r.modes for r in serial.single]
+    streamed = [views for views in AllModesStream(SAMPLE, 21.0, 18.0, workers=2)]
+    assert len(streamed) == serial.searched
+
+def test_numpy_grid_matches_dfs():
+    pytest.importorskip("numpy")
+    for seed, side_len in [(21, 15.0), (22, 9.5), (23, 0.5), (24, -1.0)]:
+        plates = _random_plates(seed, n=7)
+        for mode in ("pair", "single"):
+            for include_zero in (False, True):
+                dfs = enumerate_symmetric_combos(plates, side_len, mode=mode, include_zero=include_zero, engine="dfs")
+                grid = enumerate_symmetric_combos(plates, side_len, mode=mode, include_zero=include_zero, engine="numpy")
+                # 逐行完全一致（含计数列与浮点值），而不只是等价
+                assert list(grid.counts) == list(dfs.counts) and list(grid.rows) == list(dfs.rows)
+                assert list(grid.weights) == list(dfs.weights) and list(grid.thickness) == list(dfs.thickness)
+        shared = AllModesStream(plates, side_len, side_len - 3, engine="numpy").run()
+        assert shared == AllModesStream(plates, side_len, side_len - 3, engine="dfs").run()
+        assert [r.modes for r in shared.single] == [r.modes for r in enumerate_all_modes(plates, side_len, side_len - 3).single]
+
+def test_incremental_planner_matches_full_search():
+    rng = random.Random(31)
+    for include_zero in (False, True):
+        plates = _random_plates(31, n=6)
+        len_pair, len_conn = 14.0, 12.0
+        inc = IncrementalPlanner(include_zero=include_zero)
+        inc.update(plates, len_pair, len_conn)
+        assert inc.last_update == "full"
+        for _ in range(8):
+            # 只改数量或长度：增量更新结果应与完整重算逐项一致
+            i = rng.randrange(len(plates))
+            plates[i] = PlateType(plates[i].weight, plates[i].thickness, max(1, plates[i].count + rng.choice([-2, -1, 1, 3])), plates[i].label)
+            len_pair += rng.choice([-1.0, 0.0, 1.5])
+            len_conn += rng.choice([-0.5, 0.0, 1.0])
+            got = inc.update(plates, len_pair, len_conn)
+            want = enumerate_all_modes(plates, len_pair, len_conn, include_zero=include_zero)
+            assert got == want and [r.modes for r in got.single] == [r.modes for r in want.single]
+        assert inc.last_update == "incremental"
+    # 重量/厚度/行数变化时回退到完整计算
+    plates[0] = PlateType(plates[0].weight + 1, plates[0].thickness, plates[0].count, plates[0].label)
+    assert not inc.can_update(plates)
+    inc.update(plates, len_pair, len_conn)
+    assert inc.last_update == "full"
+
+def test_length_sweep_prefix_queries():
+    plates = _random_plates(41, n=6)
+    sweep = LengthSweep.search(plates, 16.0)
+    for len_pair, len_conn in [(16.0, 16.0), (15.0, 12.5), (7.5, 16.0), (0.0, 2.0)]:
+        # 一次搜索到最长长度，较短长度的结果由前缀查询得到，与重新计算一致
+        want = enumerate_all_modes(plates, len_pair, len_conn)
+        got = sweep.at(len_pair, len_conn)
+        assert (got.pair, got.connector, got.single) == (want.pair, want.connector, want.single)
+        assert sweep.count("connector", len_conn) == len(want.connector)
+        assert sweep.distinct_weights("pair", len_pair) == len(set(want.pair.total_weights()))
+
+def test_progress_and_cancel():
+    plates = _random_plates(5, n=9)
+    seen = []
+    full = enumerate_symmetric_combos(plates, 15.0, mode="single", progress=lambda nodes, found: seen.append((nodes, found)))
+    # 最后一次回调给出最终计数
+    assert seen and seen[-1][1] == len(full) and seen[-1][0] > len(full)
+    with pytest.raises(SearchCancelled):
+        enumerate_all_modes(plates, 15.0, 15.0, progress=lambda nodes, found: False)
+    with pytest.raises(SearchCancelled):
+        list(iter_symmetric_combos(plates, 15.0, mode="single", progress=lambda nodes, found: False))
+
+def test_iter_all_modes_streams_same_results():
+    shared = enumerate_all_modes(SAMPLE, 21.0, 18.0)
+    streamed = {"pair": [], "connector": [], "single": []}
+    for views in iter_all_modes(SAMPLE, 21.0, 18.0):
+        for mode, r in views.items():
+            streamed[mode].append(r)
+    for mode, results in streamed.items():
+        results.sort(key=lambda r: (-r.total_weight, r.per_side_thickness))
+    assert streamed == {"pair": shared.pair, "connector": shared.connector, "single": shared.single}
+
+def test_weight_index_queries():
+    results = enumerate_symmetric_combos(SAMPLE, 21.0, mode="pair")
+    index = WeightIndex.for_results(results, "pair", 0.365)
+    with_bar = [with_bar_weight("pair", r.total_weight, 0.365) for r in results]
+    assert index.exact(20.73) == [i for i, w in enumerate(with_bar) if w == 20.73]
+    assert index.range(20, 24) == [i for i, w in enumerate(with_bar) if 20 <= w <= 24]
+    rows, dist = index.nearest(21.5)
+    assert dist == min(round(abs(w - 21.5), 3) for w in with_bar)
+    assert rows == [i for i, w in enumerate(with_bar) if round(abs(w - 21.5), 3) == dist]
+    plain = WeightIndex.for_results(results, "pair")
+    assert plain.within(10, 1) == [i for i, r in enumerate(results) if 9 <= r.total_weight <= 11]
+
+def test_fixed_point_sums_are_exact():
+    # 0.1 + 0.2 在浮点下大于 0.3；整数单位下三片恰好放满 0.3 cm，重量也不带尾差
+    plates = [PlateType(0.1, 0.1, 12), PlateType(0.2, 0.2, 4)]
+    for engine in ("dfs", "frontier") + (("numpy",) if planner.np is not None else ()):
+        table = enumerate_symmetric_combos(plates, 0.3, mode="pair", engine=engine)
+        assert (table[0].total_weight, table[0].per_side_thickness) == (0.6, 0.3)
+    shared = enumerate_all_modes(plates, 0.3, 0.3)
+    assert {r.per_side_thickness for r in shared.pair} == {0.1, 0.2, 0.3}
+    assert LengthSweep(shared).count("pair", 0.3) == len(shared.pair)
+    assert LengthSweep(shared).count("pair", 0.2) == len([r for r in shared.pair if r.per_side_thickness <= 0.2])
+    assert with_bar_weight("pair", 0.6, 0.365) == 1.93
+    assert WeightIndex.for_results(shared.pair, "pair", 0.365).exact(1.93) == [
+        i for i, r in enumerate(shared.pair) if r.total_weight == 0.6]
+
+def test_solve_for_target_matches_brute_force():
+    for plates, side_len in [(SAMPLE, 21.0), (_random_plates(2), 15.0)]:
+        for mode in ("pair", "connector", "single"):
+            full = enumerate_symmetric_combos(plates, side_len, mode=mode)
+            for target in (7.3, 17.5, 30.0):
+                # 暴力解：按 与目标差距、厚度 排序（稳定排序保留重量降序）
+                want = sorted(full, key=lambda r: (round(abs(with_bar_weight(mode, r.total_weight, 0.365) - target), 6), r.per_side_thickness))
+                assert solve_for_target(plates, side_len, mode, target, 0.365, k=5) == want[:5]
+
+def test_search_stats():
+    plates = _random_plates(5)
+    serial, numpy_stats, parallel = SearchStats(), SearchStats(), SearchStats()
+    full = enumerate_symmetric_combos(plates, 15.0, mode="single", engine="dfs", stats=serial)
+    assert serial.engine == "dfs" and serial.results == len(full) == serial.raw
+    assert serial.nodes > serial.raw and serial.pruned > 0
+    assert list(serial.timings) == ["search", "dedup", "sort"]
+    # 并行搜索与串行搜索访问的节点、剪枝数一致
+    enumerate_symmetric_combos(plates, 15.0, mode="single", engine="dfs", workers=2, stats=parallel)
+    assert (parallel.engine, parallel.nodes, parallel.pruned) == ("parallel", serial.nodes, serial.pruned)
+    if planner.np is not None:
+        enumerate_symmetric_combos(plates, 15.0, mode="single", engine="numpy", stats=numpy_stats)
+        assert numpy_stats.engine == "numpy" and numpy_stats.results == len(full)
+
+    # 流式接口：消费结束（或提前关闭）时填好统计
+    streamed = SearchStats()
+    assert len(list(iter_symmetric_combos(plates, 15.0, mode="single", stats=streamed))) == streamed.results == len(full)
+    assert streamed.engine == "best_first" and "search" in streamed.timings
+
+    shared = enumerate_all_modes(SAMPLE, 21.0, 18.0)
+    assert shared.stats.results == shared.searched and "views" in shared.stats.timings
+    incremental = IncrementalPlanner()
+    incremental.update(SAMPLE, 21.0, 18.0)
+    fewer = [PlateType(p.weight, p.thickness, p.count - 2 if p.count > 4 else p.count, p.label) for p in SAMPLE]
+    stats = SearchStats()
+    result = incremental.update(fewer, 21.0, 18.0, stats=stats)
+    assert stats.engine == "incremental" and result.stats is stats
+    assert stats.carried == stats.results and stats.raw == 0
+
+    if planner.np is not None:
+        # 网格搜索中途取消：raw 只计已交付的行
+        calls = []
+        cancelled = SearchStats()
+        stream = AllModesStream([PlateType(w, 0.5, 20) for w in (5, 4, 3, 2, 1)], 100.0, 100.0, engine="numpy",
+                                progress=lambda nodes, found: calls.append(found) or len(calls) < 3, stats=cancelled)
+        with pytest.raises(SearchCancelled):
+            for _ in stream:
+                pass
+        stream.result()
+        assert cancelled.engine == "numpy" and cancelled.raw == len(stream.table) < cancelled.nodes
@@ -0,0 +1,34 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_main_window_does_not_import_matplotlib():
+    pytest.importorskip("PySide6")
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", PYTHONPATH=ROOT)
+    code = ("import sys; from PySide6 import QtWidgets; import main; app = QtWidgets.QApplication([]); "
+            "w = main.MainWindow(); w.show(); app.processEvents(); print('matplotlib' in sys.modules)")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    # 主窗口启动时不加载 matplotlib，首次画上片图时才加载
+    assert out.stdout.split()[-1] == "False"
+
+def test_font_resolution_is_cached(tmp_path):
+    pytest.importorskip("matplotlib")
+    pytest.importorskip("PySide6")
+    import diagram
+
+    first = diagram.resolve_chinese_font(str(tmp_path))
+    path = tmp_path / "font.json"
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["font"] == first
+    # 第二次直接读缓存（这里改写缓存以证明没有重新遍历字体列表）
+    data["font"] = "Cached Font"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    assert diagram.resolve_chinese_font(str(tmp_path)) == "Cached Font"
+    data["matplotlib"] = "0.0"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    assert diagram.resolve_chinese_font(str(tmp_path)) == first